@@ -1,99 +1,268 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 import os
 import json
 import traceback
 from modules.input_handler import InputHandler
-from modules.article_finder import ArticleFinder
-from modules.web_scraper import WebScraper
-from modules.text_cleaner import TextCleaner
-from modules.ai_extractor import AIExtractor
-from modules.data_normalizer import DataNormalizer
-from modules.visual_mapper import VisualMapper
-from modules.layout_engine import LayoutEngine
-from modules.image_generator import ImageGenerator
-from modules.gif_generator import GIFGenerator
+from modules.pipeline import VisualizationPipeline
+from modules.job_manager import JobManager
+from modules.batch_runner import BatchRunner
+from modules import tracing
+from modules.llm_clients import registry as llm_clients
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['Server-Timing'])
 
 # Create output directory
 OUTPUT_DIR = 'output'
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Pipeline with result/stage/HTTP caches configured from the environment
+pipeline = VisualizationPipeline.from_env(OUTPUT_DIR)
+
+# Background workers for the asynchronous job API
+job_manager = JobManager(
+    pipeline,
+    max_workers=int(os.getenv('JOB_WORKERS', '4')),
+    retention=int(os.getenv('JOB_RETENTION', '3600'))
+)
+
+# Build LLM clients once at startup instead of on the first request
+if os.getenv('LLM_WARMUP', 'true').lower() in ('1', 'true', 'yes'):
+    llm_clients.warm_up()
+
+# Always attach the Server-Timing header (otherwise only on ?timing=1)
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() in ('1', 'true', 'yes')
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "message": "System Design Visualizer API is running"})
+    return jsonify({
+        "status": "healthy",
+        "message": "System Design Visualizer API is running",
+        "providers": llm_clients.health()
+    })
 
 @app.route('/api/generate', methods=['POST'])
 def generate_visualization():
     try:
         data = request.json
         
+        trace = tracing.Trace()
+        
         # Step 1: Input Handler
-        input_handler = InputHandler()
-        config = input_handler.validate_and_parse(data)
+        config = _parse_input(data, trace)
         
-        # Step 2: Article Finder
-        article_finder = ArticleFinder()
-        urls = article_finder.find_articles(config['topic'], config['design'])
+        # Steps 2-10: scrape, clean, extract, normalize, map, layout, render
+        result = pipeline.run(config, trace=trace)
         
-        # Step 3: Web Scraper
-        scraper = WebScraper()
-        raw_text = scraper.scrape_urls(urls)
+        response = jsonify(_build_response(result))
+        if SERVER_TIMING or request.args.get('timing', '').lower() in ('1', 'true', 'yes'):
+            response.headers['Server-Timing'] = trace.server_timing()
+        return response
         
-        # Step 4: Text Cleaner
-        cleaner = TextCleaner()
-        clean_text = cleaner.clean(raw_text)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/batch', methods=['POST'])
+def generate_batch():
+    try:
+        data = request.json or {}
+        requests_data = data.get('configs', [])
         
-        # Step 5: AI Extractor
-        extractor = AIExtractor()
-        architecture_data = extractor.extract(clean_text, config['ai_provider'])
+        if not isinstance(requests_data, list) or not requests_data:
+            raise ValueError("configs must be a non-empty list of generate requests")
         
-        # Step 6: Data Normalizer
-        normalizer = DataNormalizer()
-        normalized_data = normalizer.normalize(architecture_data)
+        # Batches run on a background job worker; poll or stream the job for the manifest
+        runner = BatchRunner(pipeline, max_workers=int(os.getenv('BATCH_WORKERS', '4')))
+        job_id = job_manager.submit_batch(runner, requests_data)
         
-        # Step 7: Visual Mapper
-        mapper = VisualMapper()
-        visual_data = mapper.map_visuals(normalized_data)
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status_url": f"/api/jobs/{job_id}"
+        }), 202
         
-        # Step 8: Layout Engine
-        layout = LayoutEngine()
-        positioned_data = layout.calculate_layout(visual_data)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400 if isinstance(e, ValueError) else 500
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    try:
+        data = request.json
         
-        # Step 9: Image Generator
-        image_gen = ImageGenerator()
-        metadata = {'topic': config['topic'], 'design': config['design']}
-        image_path = image_gen.generate(positioned_data, OUTPUT_DIR, metadata)
+        # Step 1: Input Handler (validated up front so bad input fails fast)
+        config = _parse_input(data)
         
-        # Step 10: GIF Generator (optional)
-        gif_path = None
-        if config.get('generate_gif', False):
-            gif_gen = GIFGenerator()
-            gif_path = gif_gen.generate(positioned_data, OUTPUT_DIR)
+        # Steps 2-10 run on a background worker
+        job_id = job_manager.submit(config)
         
         return jsonify({
             "success": True,
-            "image_path": f"/api/download/{os.path.basename(image_path)}",
-            "gif_path": f"/api/download/{os.path.basename(gif_path)}" if gif_path else None,
-            "components": normalized_data['components'],
-            "relationships": normalized_data['relationships']
-        })
+            "job_id": job_id,
+            "status_url": f"/api/jobs/{job_id}"
+        }), 202
         
     except Exception as e:
         traceback.print_exc()
         return jsonify({
             "success": False,
             "error": str(e)
-        }), 500
+        }), 400 if isinstance(e, ValueError) else 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    
+    return jsonify({
+        "success": job['status'] != 'failed',
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "current_step": job['current_step'],
+        "total_steps": job['total_steps'],
+        "stages": job['stages'],
+        "timings": job['timings'],
+        "result": _job_result(job['kind'], job['result']) if job['result'] else None,
+        "error": job['error']
+    })
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    if not job_manager.get(job_id):
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return _event_stream(job_id)
+
+@app.route('/api/generate/stream', methods=['GET'])
+def generate_visualization_stream():
+    """Streaming variant of /api/generate (Server-Sent Events, query-string input)"""
+    try:
+        data = request.args.to_dict()
+        data['generate_gif'] = data.get('generate_gif', 'false').lower() in ('1', 'true', 'yes')
+        
+        # Step 1: Input Handler
+        config = _parse_input(data)
+        
+        # Steps 2-10 run on a background worker and report each stage as it finishes
+        job_id = job_manager.submit(config)
+        return _event_stream(job_id)
+        
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400 if isinstance(e, ValueError) else 500
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Per-stage timings, sizes and cache hit/miss counts in Prometheus text format"""
+    return Response(tracing.registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+def _parse_input(data, trace=None):
+    """Validate request data with InputHandler, timed as the 'input' stage"""
+    trace = trace or tracing.Trace()
+    with trace.span('input'):
+        input_handler = InputHandler()
+        return input_handler.validate_and_parse(data)
+
+def _event_stream(job_id):
+    """Stream a job's stage results as Server-Sent Events"""
+    job = job_manager.get(job_id)
+    kind = job['kind'] if job else 'generate'
+    
+    def generate():
+        yield _sse('job', {"job_id": job_id, "status_url": f"/api/jobs/{job_id}"})
+        
+        for event in job_manager.iter_events(job_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+            elif event['event'] == 'stage':
+                yield _sse('stage', _stage_payload(event))
+            elif event['event'] == 'complete':
+                yield _sse('complete', _job_result(kind, event['result']))
+            else:
+                yield _sse('error', {"success": False, "error": event['error']})
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _sse(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _stage_payload(event):
+    """Shape a stage's intermediate output for streaming clients"""
+    payload = {"step": event['step'], "name": event['name'], "status": event['status']}
+    output = event['output']
+    
+    if output is None:
+        return payload
+    
+    if event['name'] == 'articles':
+        payload['urls'] = output
+    elif event['name'] in ('extract', 'normalize'):
+        payload['components'] = output['components']
+        payload['relationships'] = output['relationships']
+    elif event['name'] == 'layout':
+        # Layout hands the compact graph on to rendering; stream its dict form
+        output = output.to_dict() if hasattr(output, 'to_dict') else output
+        payload['components'] = output['components']
+        payload['relationships'] = output['relationships']
+        payload['positions'] = output['positions']
+        payload['canvas_width'] = output['canvas_width']
+        payload['canvas_height'] = output['canvas_height']
+    elif event['name'] in ('image', 'gif'):
+        payload['path'] = f"/api/download/{os.path.basename(output)}"
+    
+    return payload
+
+def _job_result(kind, result):
+    """Response payload for a finished job's result"""
+    if kind == 'batch':
+        return _batch_response(result)
+    return _build_response(result)
+
+def _batch_response(manifest):
+    """Batch manifest with artifact paths turned into download URLs"""
+    manifest = dict(manifest, success=manifest['failed'] == 0)
+    manifest['results'] = [dict(entry) for entry in manifest['results']]
+    for entry in manifest['results']:
+        for field in ('image_path', 'gif_path'):
+            if entry.get(field):
+                entry[field] = f"/api/download/{os.path.basename(entry[field])}"
+    return manifest
+
+def _build_response(result):
+    """Build the /api/generate success payload from a pipeline result"""
+    image_path = result['image_path']
+    gif_path = result['gif_path']
+    return {
+        "success": True,
+        "cached": result['cached'],
+        "image_path": f"/api/download/{os.path.basename(image_path)}",
+        "gif_path": f"/api/download/{os.path.basename(gif_path)}" if gif_path else None,
+        "components": result['components'],
+        "relationships": result['relationships']
+    }
 
 @app.route('/api/download/<filename>', methods=['GET'])
 def download_file(filename):
     try:
         file_path = os.path.join(OUTPUT_DIR, filename)
-        if os.path.exists(file_path):
-            return send_file(file_path, as_attachment=False)
+        if os.path.basename(filename) == filename and os.path.isfile(file_path):
+            return send_from_directory(os.path.abspath(OUTPUT_DIR), filename, as_attachment=False)
         return jsonify({"error": "File not found"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,65 @@
+"""
+Batch pre-rendering of architecture diagrams
+
+Examples:
+    python batch_generate.py --all
+    python batch_generate.py --topics uber netflix --designs hld --providers gemini cohere --gif
+    python batch_generate.py --config nightly.json --manifest output/nightly_manifest.json
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from modules.input_handler import InputHandler
+from modules.pipeline import VisualizationPipeline
+from modules.batch_runner import BatchRunner
+
+OUTPUT_DIR = 'output'
+
+def build_requests(args):
+    """Build the list of request dicts from CLI arguments"""
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    topics = InputHandler.VALID_TOPICS if args.all or not args.topics else args.topics
+    designs = InputHandler.VALID_DESIGNS if args.all or not args.designs else args.designs
+    providers = InputHandler.VALID_PROVIDERS if args.all or not args.providers else args.providers
+
+    return [
+        {'topic': topic, 'design': design, 'ai_provider': provider, 'generate_gif': args.gif}
+        for topic, design, provider in itertools.product(topics, designs, providers)
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-render system design diagrams in batch')
+    parser.add_argument('--config', help='JSON file with a list of /api/generate request bodies')
+    parser.add_argument('--all', action='store_true', help='Every topic x design x provider')
+    parser.add_argument('--topics', nargs='+', help='Topics to render')
+    parser.add_argument('--designs', nargs='+', help='Design types to render (hld, lld)')
+    parser.add_argument('--providers', nargs='+', help='AI providers to use')
+    parser.add_argument('--gif', action='store_true', help='Also generate animated GIFs')
+    parser.add_argument('--workers', type=int, default=4, help='Threads for scraping/extraction')
+    parser.add_argument('--render-workers', type=int, default=None, help='Processes for rendering')
+    parser.add_argument('--manifest', help='Manifest output path')
+    args = parser.parse_args(argv)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest_path = args.manifest or os.path.join(
+        OUTPUT_DIR, f"batch_manifest_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+
+    pipeline = VisualizationPipeline.from_env(OUTPUT_DIR)
+    runner = BatchRunner(pipeline, max_workers=args.workers, render_workers=args.render_workers)
+    manifest = runner.run(build_requests(args), manifest_path)
+
+    print(f"Batch finished in {manifest['duration']}s: {manifest['succeeded']} succeeded, "
+          f"{manifest['failed']} failed ({manifest['unique']} unique of {manifest['total']})")
+    print(f"Manifest written to {manifest_path}")
+
+    return 1 if manifest['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""
+Offline per-stage benchmarks for the generation pipeline
+
+Runs each stage in isolation on recorded HTML, synthetic corpora, synthetic
+graphs (10 to 5,000 components) and stubbed LLM responses, then reports
+latency percentiles, peak memory and scaling per input size. Stages that
+promise bounded memory fail the run if their peak grows with input size.
+
+Timings depend on the machine, so no baseline is committed: save one on
+the machine that will run the comparison (benchmarks/baseline.json is
+git-ignored) before changing code, then compare against it afterwards.
+
+Examples (from the repository root):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --quick
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 1.25
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.workloads import (
+    load_html_fixtures, synthetic_corpus, synthetic_sentence_stream, synthetic_architecture,
+    StubLLMExtractor
+)
+from modules.web_scraper import WebScraper
+from modules.text_cleaner import TextCleaner
+from modules.ai_extractor import AIExtractor
+from modules.data_normalizer import DataNormalizer
+from modules.visual_mapper import VisualMapper
+from modules.layout_engine import LayoutEngine
+from modules.image_generator import ImageGenerator
+from modules.gif_generator import GIFGenerator
+
+GRAPH_SIZES = [10, 50, 100, 500, 1000, 5000]
+CORPUS_SIZES = [1, 4, 16, 64]
+QUICK_GRAPH_SIZES = [10, 100]
+QUICK_CORPUS_SIZES = [1, 4]
+
+# Sentence counts for the streaming memory check, with the near-duplicate
+# window and scoring batch kept small so both sizes fill them: any peak
+# growth past that is state that scales with the input
+STREAM_MEMORY_SIZES = [1000, 8000]
+STREAM_MEMORY_WINDOW = 512
+STREAM_MEMORY_BATCH = 256
+
+class Benchmark:
+    """One stage benchmarked over a series of input sizes"""
+
+    def __init__(self, stage, sizes, prepare, complexity=1, max_memory_growth=None):
+        """
+        prepare(size) -> zero-argument callable running the stage once
+        complexity: exponent used to predict the next size's cost, so
+        super-linear stages skip sizes that would exceed the time budget
+        max_memory_growth: for bounded-memory stages, the most the peak at
+        the largest size may be over the peak at the smallest size
+        """
+        self.stage = stage
+        self.sizes = sizes
+        self.prepare = prepare
+        self.complexity = complexity
+        self.max_memory_growth = max_memory_growth
+
+def build_benchmarks(graph_sizes, corpus_sizes, output_dir):
+    """Define every stage benchmark with its inputs prepared outside the timed region"""
+    html_pages = load_html_fixtures()
+    scraper = WebScraper()
+    cleaner = TextCleaner()
+    normalizer = DataNormalizer()
+    mapper = VisualMapper()
+    layout = LayoutEngine()
+
+    def scrape_parse(size):
+        pages = list(html_pages.values()) * size
+        return lambda: [scraper._extract_text(html) for html in pages]
+
+    def clean(size):
+        corpus = synthetic_corpus(size)
+        return lambda: cleaner.clean(corpus)
+
+    def clean_stream(size):
+        pages = synthetic_corpus(size).split("\n\n")
+        return lambda: cleaner.clean_stream(iter(pages))
+
+    def clean_stream_memory(size):
+        bounded = TextCleaner(near_duplicate_window=STREAM_MEMORY_WINDOW)
+        bounded.STREAM_BATCH_SIZE = STREAM_MEMORY_BATCH
+        return lambda: bounded.clean_stream(synthetic_sentence_stream(size))
+
+    def extract_fallback(size):
+        text = cleaner.clean(synthetic_corpus(size))
+        extractor = AIExtractor()
+        return lambda: extractor._extract_fallback(text)
+
+    def extract_stub_llm(size):
+        text = cleaner.clean(synthetic_corpus(size))
+        extractor = StubLLMExtractor()
+        return lambda: extractor.extract(text, 'gemini')
+
+    def extract_ensemble(size):
+        text = cleaner.clean(synthetic_corpus(size))
+        extractor = StubLLMExtractor()
+        return lambda: extractor.extract(text, 'ensemble')
+
+    def normalize(size):
+        raw = synthetic_architecture(size)
+        return lambda: normalizer.normalize(raw)
+
+    # Map, layout and render pass the compact ArchitectureGraph, as in the pipeline
+    def positioned(size):
+        visual = mapper.map_graph(normalizer.normalize(synthetic_architecture(size, duplicate_ratio=0)))
+        return layout.layout_graph(visual)
+
+    def map_visuals(size):
+        normalized = normalizer.normalize(synthetic_architecture(size, duplicate_ratio=0))
+        return lambda: mapper.map_graph(normalized)
+
+    def calculate_layout(size):
+        visual = mapper.map_graph(normalizer.normalize(synthetic_architecture(size, duplicate_ratio=0)))
+        return lambda: layout.layout_graph(visual)
+
+    def render_image(size):
+        data = positioned(size)
+        return lambda: ImageGenerator().generate(data, output_dir, {'topic': 'bench', 'design': 'HLD'})
+
+    def render_gif(size):
+        data = positioned(size)
+        return lambda: GIFGenerator().generate(data, output_dir)
+
+    return [
+        Benchmark('scrape.parse_html', corpus_sizes, scrape_parse),
+        Benchmark('clean', corpus_sizes, clean),
+        Benchmark('clean.stream', corpus_sizes, clean_stream),
+        Benchmark('clean.stream.memory', STREAM_MEMORY_SIZES, clean_stream_memory, max_memory_growth=1.5),
+        Benchmark('extract.fallback', corpus_sizes, extract_fallback),
+        Benchmark('extract.stub_llm', corpus_sizes, extract_stub_llm),
+        Benchmark('extract.ensemble', corpus_sizes, extract_ensemble),
+        Benchmark('normalize', graph_sizes, normalize, complexity=2),
+        Benchmark('map', graph_sizes, map_visuals),
+        Benchmark('layout', graph_sizes, calculate_layout),
+        Benchmark('render.image', graph_sizes, render_image),
+        Benchmark('render.gif', [s for s in graph_sizes if s <= 500], render_gif),
+    ]
+
+def percentile(samples, pct):
+    """Linear-interpolated percentile of a list of numbers"""
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def measure(func, min_runs, max_runs, time_budget):
+    """
+    Time func until max_runs or the time budget is used (at least min_runs)
+    Returns latency stats in milliseconds plus the traced peak memory in KB
+    """
+    func()  # Warm-up (imports, font loading, regex compilation)
+
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_runs:
+        t0 = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - t0) * 1000)
+        if len(samples) >= min_runs and time.perf_counter() - started > time_budget:
+            break
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'runs': len(samples),
+        'mean_ms': round(sum(samples) / len(samples), 3),
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'peak_kb': round(peak / 1024, 1)
+    }
+
+def run_benchmarks(benchmarks, stages=None, min_runs=3, max_runs=50, time_budget=2.0, max_run_seconds=10.0):
+    """Run every selected benchmark; returns {stage: {size: stats}}"""
+    results = {}
+
+    for bench in benchmarks:
+        if stages and bench.stage not in stages:
+            continue
+
+        results[bench.stage] = {}
+        previous = None
+        for size in bench.sizes:
+            # Skip sizes predicted to blow the per-run budget
+            if previous:
+                prev_size, prev_ms = previous
+                predicted = prev_ms / 1000 * (size / prev_size) ** bench.complexity
+                if predicted > max_run_seconds:
+                    results[bench.stage][str(size)] = {'skipped': f"predicted {predicted:.1f}s per run"}
+                    print(f"  {bench.stage:<20} size={size:<6} skipped (predicted {predicted:.1f}s per run)")
+                    continue
+
+            func = bench.prepare(size)
+            stats = measure(func, min_runs, max_runs, time_budget)
+            results[bench.stage][str(size)] = stats
+            previous = (size, stats['p50_ms'])
+
+            print(f"  {bench.stage:<20} size={size:<6} p50={stats['p50_ms']:>10.2f}ms "
+                  f"p95={stats['p95_ms']:>10.2f}ms p99={stats['p99_ms']:>10.2f}ms "
+                  f"peak={stats['peak_kb']:>10.1f}KB runs={stats['runs']}")
+
+    return results
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Compare p50 latencies against a stored baseline
+    Returns a list of regressions (stage, size, baseline_ms, current_ms, ratio)
+    """
+    regressions = []
+    for stage, sizes in results.items():
+        for size, stats in sizes.items():
+            base = baseline.get('results', {}).get(stage, {}).get(size)
+            if not base or 'p50_ms' not in base or 'p50_ms' not in stats:
+                continue
+            ratio = stats['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 1.0
+            if ratio > threshold:
+                regressions.append((stage, size, base['p50_ms'], stats['p50_ms'], round(ratio, 2)))
+    return regressions
+
+def check_memory(results, benchmarks):
+    """
+    Check bounded-memory stages: peak memory at the largest measured size
+    must stay within max_memory_growth of the smallest size's
+    Returns a list of violations (stage, small_size, large_size, small_kb, large_kb, ratio)
+    """
+    violations = []
+    for bench in benchmarks:
+        if not bench.max_memory_growth or bench.stage not in results:
+            continue
+
+        measured = [
+            (int(size), stats['peak_kb']) for size, stats in results[bench.stage].items() if 'peak_kb' in stats
+        ]
+        if len(measured) < 2:
+            continue
+
+        (small_size, small_kb), (large_size, large_kb) = min(measured), max(measured)
+        ratio = large_kb / small_kb if small_kb else 1.0
+        if ratio > bench.max_memory_growth:
+            violations.append((bench.stage, small_size, large_size, small_kb, large_kb, round(ratio, 2)))
+    return violations
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline per-stage pipeline benchmarks')
+    parser.add_argument('--quick', action='store_true', help='Small sizes only (smoke run)')
+    parser.add_argument('--stages', nargs='+', help='Only run these stages')
+    parser.add_argument('--graph-sizes', nargs='+', type=int, help='Component counts for graph stages')
+    parser.add_argument('--corpus-sizes', nargs='+', type=int, help='Article counts for text stages')
+    parser.add_argument('--time-budget', type=float, default=2.0, help='Seconds of sampling per case')
+    parser.add_argument('--max-run-seconds', type=float, default=10.0, help='Skip sizes predicted slower than this')
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--baseline', help='Compare against this stored report')
+    parser.add_argument('--save-baseline', help='Store this run as a baseline')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Allowed p50 slowdown ratio')
+    args = parser.parse_args(argv)
+
+    graph_sizes = args.graph_sizes or (QUICK_GRAPH_SIZES if args.quick else GRAPH_SIZES)
+    corpus_sizes = args.corpus_sizes or (QUICK_CORPUS_SIZES if args.quick else CORPUS_SIZES)
+
+    # Keep LLM providers offline even if keys are present in the environment
+    for env_name in AIExtractor.API_KEY_ENV.values():
+        os.environ.pop(env_name, None)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        benchmarks = build_benchmarks(graph_sizes, corpus_sizes, output_dir)
+        print(f"Running benchmarks (python {platform.python_version()}, {platform.machine()})")
+        results = run_benchmarks(
+            benchmarks,
+            stages=args.stages,
+            time_budget=args.time_budget,
+            max_run_seconds=args.max_run_seconds
+        )
+        memory_violations = check_memory(results, benchmarks)
+
+    report = {
+        'created_at': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {path}")
+
+    if memory_violations:
+        print(f"\n{len(memory_violations)} bounded-memory stage(s) grew with input size:")
+        for stage, small_size, large_size, small_kb, large_kb, ratio in memory_violations:
+            print(f"  {stage}: size={small_size} {small_kb:.1f}KB -> size={large_size} {large_kb:.1f}KB ({ratio}x)")
+        return 1
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('platform') != report['platform'] or baseline.get('python') != report['python']:
+            print(f"\nWarning: baseline was recorded on {baseline.get('platform')} "
+                  f"(python {baseline.get('python')}); timings may not be comparable")
+
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold}x baseline p50:")
+            for stage, size, base_ms, current_ms, ratio in regressions:
+                print(f"  {stage} size={size}: {base_ms:.2f}ms -> {current_ms:.2f}ms ({ratio}x)")
+            return 1
+
+        print(f"\nNo regressions over {args.threshold}x baseline p50")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Offline workloads for the pipeline benchmarks: recorded HTML, synthetic
+scraped corpora, synthetic architecture graphs and stubbed LLM responses
+"""
+import json
+import os
+import random
+from modules.ai_extractor import AIExtractor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+DOMAINS = [
+    'User', 'Order', 'Payment', 'Ride', 'Driver', 'Location', 'Search', 'Feed',
+    'Media', 'Profile', 'Billing', 'Catalog', 'Session', 'Analytics', 'Inventory', 'Chat'
+]
+
+KINDS = [
+    'Service', 'Database', 'Cache', 'Queue', 'Gateway', 'Load Balancer',
+    'Server', 'Worker', 'Storage', 'Broker', 'CDN', 'Client'
+]
+
+REL_TYPES = ['request', 'query', 'write', 'read', 'forward', 'route', 'check', 'connects']
+
+SENTENCE_WORDS = [
+    'api', 'gateway', 'service', 'cache', 'queue', 'database', 'shard', 'replica',
+    'stream', 'broker', 'node', 'cluster', 'reads', 'writes', 'routes', 'forwards',
+    'publishes', 'consumes', 'stores', 'indexes', 'through', 'behind', 'across', 'into',
+    'before', 'after', 'every', 'primary', 'secondary', 'regional', 'global', 'latency'
+] + [domain.lower() for domain in DOMAINS]
+
+def load_html_fixtures():
+    """Return {name: html bytes} for every recorded page in fixtures/"""
+    pages = {}
+    for filename in sorted(os.listdir(FIXTURES_DIR)):
+        if filename.endswith('.html'):
+            with open(os.path.join(FIXTURES_DIR, filename), 'rb') as f:
+                pages[filename] = f.read()
+    return pages
+
+def load_llm_responses():
+    """Return {provider: raw response text} recorded from real LLM calls"""
+    with open(os.path.join(FIXTURES_DIR, 'llm_responses.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def synthetic_corpus(articles, seed=0):
+    """
+    Build raw scraped text for `articles` pages by perturbing the recorded
+    fixtures (so dedupe doesn't collapse the copies)
+    """
+    from modules.web_scraper import WebScraper
+
+    rng = random.Random(seed)
+    scraper = WebScraper()
+    base_texts = [scraper._extract_text(html) for html in load_html_fixtures().values()]
+
+    texts = []
+    for i in range(articles):
+        sentences = base_texts[i % len(base_texts)].split('. ')
+        rng.shuffle(sentences)
+        tag = f"{DOMAINS[i % len(DOMAINS)]} tier {i}"
+        texts.append('. '.join(f"{s} in the {tag}" for s in sentences))
+
+    return "\n\n".join(texts)
+
+def synthetic_sentence_stream(sentences, seed=0, per_chunk=500):
+    """
+    Lazily yield raw text chunks holding `sentences` distinct architecture
+    sentences, none a near-duplicate of another, so every sentence passes
+    the cleaner's filters (for checking that streaming memory stays flat)
+    """
+    rng = random.Random(seed)
+    for start in range(0, sentences, per_chunk):
+        count = min(per_chunk, sentences - start)
+        yield '. '.join(
+            ' '.join(rng.choice(SENTENCE_WORDS) for _ in range(16)) for _ in range(count)
+        ) + '. '
+
+def synthetic_architecture(num_components, seed=0, duplicate_ratio=0.1):
+    """
+    Raw extractor-shaped output with `num_components` components, a few
+    near-duplicate names (to exercise normalization) and a layered DAG of
+    relationships
+    """
+    rng = random.Random(seed)
+    names = []
+    for i in range(num_components):
+        domain = DOMAINS[i % len(DOMAINS)]
+        kind = KINDS[(i // len(DOMAINS)) % len(KINDS)]
+        block = i // (len(DOMAINS) * len(KINDS))
+        names.append(f"{domain} {kind}" if block == 0 else f"{domain} {kind} {block}")
+
+    # Lowercase/abbreviated variants the normalizer should merge
+    duplicates = [
+        rng.choice(names).lower().replace('database', 'db')
+        for _ in range(int(num_components * duplicate_ratio))
+    ]
+
+    relationships = []
+    for i in range(1, num_components):
+        parent = rng.randrange(max(0, i - 20), i)
+        relationships.append({'from': names[parent], 'to': names[i], 'type': rng.choice(REL_TYPES)})
+        if rng.random() < 0.3:
+            other = rng.randrange(0, i)
+            relationships.append({'from': names[other], 'to': names[i], 'type': rng.choice(REL_TYPES)})
+
+    return {'components': names + duplicates, 'relationships': relationships}
+
+class StubLLMExtractor(AIExtractor):
+    """AIExtractor whose LLM providers return recorded responses (no network)"""
+
+    def __init__(self, responses=None):
+        super().__init__()
+        self.responses = responses or load_llm_responses()
+
+    def is_configured(self, provider):
+        return provider in self.responses
+
+    def _extract_gemini(self, text):
+        return self._extract_recorded('gemini', text)
+
+    def _extract_cohere(self, text):
+        return self._extract_recorded('cohere', text)
+
+    def _query_gemini(self, prompt):
+        return self.responses['gemini']
+
+    def _query_cohere(self, prompt):
+        return self.responses['cohere']
+
+    def _extract_recorded(self, provider, text):
+        """Same post-processing as the real provider path, minus the API call"""
+        result_text = self._clean_json_response(self.responses[provider])
+        data = json.loads(result_text)
+        return self._enhance_extraction(data, text)
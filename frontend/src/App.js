@@ -3,6 +3,57 @@ import axios from 'axios';
 import './App.css';
 
 const API_URL = 'http://localhost:5000';
+const TOTAL_STEPS = 10;
+
+function ProvisionalDiagram({ layout }) {
+  const { components, relationships, positions, canvas_width, canvas_height } = layout;
+
+  return (
+    <svg
+      className="provisional-diagram"
+      viewBox={`0 0 ${canvas_width} ${canvas_height}`}
+    >
+      {relationships
+        .filter((rel) => positions[rel.from] && positions[rel.to])
+        .map((rel, idx) => (
+          <line
+            key={idx}
+            x1={positions[rel.from][0]}
+            y1={positions[rel.from][1]}
+            x2={positions[rel.to][0]}
+            y2={positions[rel.to][1]}
+            stroke="#7F8C8D"
+            strokeWidth="2"
+            strokeDasharray={rel.arrow_style === 'dashed' ? '8 6' : undefined}
+          />
+        ))}
+      {components
+        .filter((comp) => positions[comp.name])
+        .map((comp) => (
+          <g key={comp.name}>
+            <rect
+              x={positions[comp.name][0] - 60}
+              y={positions[comp.name][1] - 30}
+              width="120"
+              height="60"
+              rx="8"
+              fill={comp.color}
+            />
+            <text
+              x={positions[comp.name][0]}
+              y={positions[comp.name][1]}
+              fill="white"
+              fontSize="13"
+              textAnchor="middle"
+              dominantBaseline="middle"
+            >
+              {comp.name}
+            </text>
+          </g>
+        ))}
+    </svg>
+  );
+}
 
 function App() {
   const [formData, setFormData] = useState({
@@ -15,6 +66,8 @@ function App() {
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
+  const [progress, setProgress] = useState(null);
+  const [preview, setPreview] = useState(null);
 
   const topics = [
     { value: 'uber', label: 'Uber', icon: '🚗' },
@@ -35,20 +88,47 @@ function App() {
   const aiProviders = [
     { value: 'gemini', label: 'Google Gemini', icon: '✨' },
     { value: 'cohere', label: 'Cohere', icon: '🧠' },
-    { value: 'huggingface', label: 'HuggingFace', icon: '🤗' }
+    { value: 'huggingface', label: 'HuggingFace', icon: '🤗' },
+    { value: 'ensemble', label: 'Ensemble', icon: '🗳️' }
   ];
 
+  const streamJob = (jobId) => new Promise((resolve, reject) => {
+    const events = new EventSource(`${API_URL}/api/jobs/${jobId}/events`);
+
+    events.addEventListener('stage', (e) => {
+      const stage = JSON.parse(e.data);
+      setProgress(stage);
+
+      // Draw a provisional diagram as soon as positions are known
+      if (stage.name === 'layout' && stage.positions) {
+        setPreview(stage);
+      }
+    });
+
+    events.addEventListener('complete', (e) => {
+      events.close();
+      resolve(JSON.parse(e.data));
+    });
+
+    events.addEventListener('error', (e) => {
+      events.close();
+      reject(new Error(e.data ? JSON.parse(e.data).error : 'Lost connection to server'));
+    });
+  });
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setLoading(true);
     setError(null);
     setResult(null);
+    setProgress(null);
+    setPreview(null);
 
     try {
-      const response = await axios.post(`${API_URL}/api/generate`, formData);
+      const response = await axios.post(`${API_URL}/api/jobs`, formData);
       
       if (response.data.success) {
-        setResult(response.data);
+        setResult(await streamJob(response.data.job_id));
       } else {
         setError(response.data.error || 'Generation failed');
       }
@@ -56,6 +136,8 @@ function App() {
       setError(err.response?.data?.error || err.message || 'Network error');
     } finally {
       setLoading(false);
+      setProgress(null);
+      setPreview(null);
     }
   };
 
@@ -164,7 +246,9 @@ function App() {
               {loading ? (
                 <>
                   <span className="spinner"></span>
-                  Generating Architecture...
+                  {progress
+                    ? `Step ${progress.step}/${TOTAL_STEPS}: ${progress.name}...`
+                    : 'Generating Architecture...'}
                 </>
               ) : (
                 <>
@@ -185,6 +269,18 @@ function App() {
             </div>
           )}
 
+          {preview && !result && (
+            <div className="result-card">
+              <div className="result-header">
+                <h2>
+                  <span className="result-icon">🧭</span>
+                  Preview (rendering final image...)
+                </h2>
+              </div>
+              <ProvisionalDiagram layout={preview} />
+            </div>
+          )}
+
           {result && (
             <div className="result-card">
               <div className="result-header">
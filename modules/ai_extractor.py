@@ -1,6 +1,18 @@
+import asyncio
+import contextvars
 import json
+import math
 import re
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from modules.prompt_packer import PromptPacker
+from modules.component_classifier import ComponentClassifier
+from modules.llm_clients import LLMClientRegistry, registry as llm_clients
+from modules import tracing
+
+class ProviderUnavailable(Exception):
+    """An LLM provider can't be used for this request (no API key, replay miss)"""
 
 class AIExtractor:
     """Step 5: AI Extraction Module (Pluggable with Enhanced NER)"""
@@ -58,6 +70,67 @@ Return ONLY the JSON object, nothing else."""
         (r'(\w+(?:\s+\w+)?)\s+→\s+(\w+(?:\s+\w+)?)', 'request'),
     ]
     
+    # Compiled once; the patterns stay separate passes because their matches
+    # overlap (e.g. "Redis Cache" yields both "Redis Cache" and "Redis")
+    COMPONENT_REGEXES = [re.compile(pattern, re.IGNORECASE) for pattern in COMPONENT_PATTERNS]
+    RELATIONSHIP_REGEXES = [
+        (re.compile(pattern, re.IGNORECASE), rel_type) for pattern, rel_type in RELATIONSHIP_PATTERNS
+    ]
+    
+    # Keyword -> architectural role for default relationships (multi-label)
+    ROLE_CLASSIFIER = ComponentClassifier([
+        ('client', 'client'), ('user', 'client'), ('frontend', 'client'),
+        ('gateway', 'gateway'), ('api', 'gateway'),
+        ('balanc', 'balancer'),
+        ('service', 'service'), ('server', 'service'),
+        ('database', 'database'), ('db', 'database'), ('mongo', 'database'), ('sql', 'database'),
+        ('postgres', 'database'), ('mysql', 'database'), ('cassandra', 'database'),
+        ('cache', 'cache'), ('redis', 'cache'),
+        ('queue', 'queue'), ('kafka', 'queue'), ('rabbit', 'queue'), ('sqs', 'queue'),
+        ('cdn', 'cdn')
+    ])
+    
+    # Environment variables holding provider API keys
+    API_KEY_ENV = LLMClientRegistry.API_KEY_ENV
+    
+    # Model used per LLM provider (part of the LLM cache key)
+    MODELS = LLMClientRegistry.MODELS
+    
+    def __init__(self, llm_cache=None, hedging=None, hedge_delay=None, hedge_timeout=None,
+                 ensemble_timeout=None):
+        """
+        llm_cache: optional LLMCache for provider responses
+        hedging: race a backup (another provider or the rule-based extractor)
+        when the primary provider is slower than its p95 latency (LLM_HEDGING)
+        hedge_delay: seconds to wait before hedging until enough latencies are known
+        hedge_timeout: seconds to wait for any LLM answer in hedged mode
+        ensemble_timeout: seconds the ensemble waits for its slowest provider
+        """
+        self.llm_cache = llm_cache
+        if hedging is None:
+            hedging = os.getenv('LLM_HEDGING', 'false').lower() in ('1', 'true', 'yes')
+        if hedge_delay is None:
+            hedge_delay = float(os.getenv('LLM_HEDGE_DELAY', '8'))
+        if hedge_timeout is None:
+            hedge_timeout = float(os.getenv('LLM_HEDGE_TIMEOUT', '30'))
+        if ensemble_timeout is None:
+            ensemble_timeout = float(os.getenv('LLM_ENSEMBLE_TIMEOUT', '30'))
+        self.hedging = hedging
+        self.hedge_delay = hedge_delay
+        self.hedge_timeout = hedge_timeout
+        self.ensemble_timeout = ensemble_timeout
+        
+        # Set when a configured provider's answer was replaced by the
+        # rule-based fallback (error, open circuit or hedge) or by a hedged
+        # backup provider, so callers can keep the stop-gap result out of
+        # their caches
+        self.degraded = False
+    
+    def is_configured(self, provider):
+        """Check whether an LLM provider has an API key set"""
+        env_name = self.API_KEY_ENV.get(provider)
+        return bool(env_name and os.getenv(env_name))
+    
     def extract(self, text, provider):
         """
         Extract architecture using selected AI provider
@@ -68,68 +141,291 @@ Return ONLY the JSON object, nothing else."""
             return self._extract_cohere(text)
         elif provider == "gemini":
             return self._extract_gemini(text)
+        elif provider == "ensemble":
+            return self._extract_ensemble(text)
         else:
             return self._extract_fallback(text)
     
     def _extract_gemini(self, text):
         """Extract using Google Gemini"""
+        return self._extract_llm('gemini', text)
+    
+    def _extract_cohere(self, text):
+        """Extract using Cohere"""
+        return self._extract_llm('cohere', text)
+    
+    def _extract_llm(self, provider, text):
+        """
+        Extract with an LLM provider: build the prompt, reuse a cached
+        response when one exists, otherwise query the provider
+        """
+        self.degraded = False
+        # Hedging only pays off for a provider that will really be queried;
+        # an unusable one gets the same plain fallback as without hedging
+        if self.hedging and self._can_query(provider):
+            return self._extract_hedged(provider, text)
+        
         try:
-            import google.generativeai as genai
-            
-            api_key = os.getenv('GEMINI_API_KEY')
-            if not api_key:
-                print("GEMINI_API_KEY not set, using enhanced fallback")
-                return self._extract_fallback(text)
-            
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-pro')
-            
-            prompt = self.EXTRACTION_PROMPT.format(text=text[:4000])
-            response = model.generate_content(prompt)
-            
-            result_text = response.text
-            result_text = self._clean_json_response(result_text)
-            
-            data = json.loads(result_text)
+            data = self._llm_data(provider, text)
             
             # Validate and enhance with pattern extraction
             return self._enhance_extraction(data, text)
             
+        except ProviderUnavailable as e:
+            print(f"{e}, using enhanced fallback")
+            return self._extract_fallback(text)
         except Exception as e:
-            print(f"Gemini extraction error: {e}")
+            print(f"{provider.title()} extraction error: {e}")
+            self.degraded = True
             return self._extract_fallback(text)
     
-    def _extract_cohere(self, text):
-        """Extract using Cohere"""
+    def _extract_ensemble(self, text):
+        """
+        Run the rule-based extractor and every LLM provider concurrently and
+        fuse their answers by vote (see _fuse). Wall time is that of the
+        slowest call, capped at ensemble_timeout.
+        """
+        self.degraded = False
+        sources = list(self.MODELS) + ['rules']
+        executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='llm-ensemble')
         try:
-            import cohere
-            
-            api_key = os.getenv('COHERE_API_KEY')
-            if not api_key:
-                print("COHERE_API_KEY not set, using enhanced fallback")
-                return self._extract_fallback(text)
-            
-            co = cohere.Client(api_key)
-            
-            prompt = self.EXTRACTION_PROMPT.format(text=text[:4000])
-            response = co.generate(
-                model='command',
-                prompt=prompt,
-                max_tokens=1500,
-                temperature=0.3
-            )
-            
-            result_text = response.generations[0].text
-            result_text = self._clean_json_response(result_text)
+            answers = asyncio.run(self._gather_ensemble(executor, sources, text))
+        finally:
+            # A provider past the timeout keeps running without holding up the response
+            executor.shutdown(wait=False)
+        
+        results = []
+        for source, answer in zip(sources, answers):
+            if isinstance(answer, ProviderUnavailable):
+                print(f"{answer}, left out of the ensemble")
+            elif isinstance(answer, asyncio.TimeoutError):
+                print(f"{source.title()} timed out after {self.ensemble_timeout:g}s, left out of the ensemble")
+                self.degraded = True
+            elif isinstance(answer, Exception):
+                print(f"{source.title()} extraction error: {answer}")
+                self.degraded = True
+            elif isinstance(answer, dict) and isinstance(answer.get('components'), list):
+                results.append((source, answer))
+            else:
+                print(f"{source.title()} returned no components list")
+                self.degraded = True
+        
+        tracing.annotate(ensemble_sources=len(results))
+        if not results:
+            return self._extract_fallback(text)
+        return self._fuse(results)
+    
+    async def _gather_ensemble(self, executor, sources, text):
+        """Answers (or exceptions) from every source, in order"""
+        loop = asyncio.get_running_loop()
+        calls = []
+        for source in sources:
+            func = self._extract_fallback if source == 'rules' else lambda text, source=source: self._llm_data(source, text)
+            # Each call runs in a copy of the caller's context so it reports into its trace
+            call = loop.run_in_executor(executor, contextvars.copy_context().run, func, text)
+            calls.append(asyncio.wait_for(call, timeout=self.ensemble_timeout))
+        return await asyncio.gather(*calls, return_exceptions=True)
+    
+    def _fuse(self, results):
+        """
+        Majority vote over (source, data) answers: a component or relationship
+        is kept if at least half of the answering sources report it (so with
+        one LLM plus the rules this is their union). Names are compared
+        case- and whitespace-insensitively, spelled as the first source that
+        reports them; a relationship takes its most voted type.
+        """
+        quorum = math.ceil(len(results) / 2)
+        
+        names = {}
+        component_votes = {}
+        relationship_votes = {}
+        for _, data in results:
+            keys = set()
+            for name in data.get('components', []):
+                if not isinstance(name, str) or not name.strip():
+                    continue
+                key = self._vote_key(name)
+                names.setdefault(key, ' '.join(name.split()))
+                keys.add(key)
+            for key in keys:
+                component_votes[key] = component_votes.get(key, 0) + 1
             
-            data = json.loads(result_text)
+            pairs = {}
+            for rel in data.get('relationships', []):
+                if not isinstance(rel, dict) or not rel.get('from') or not rel.get('to'):
+                    continue
+                pair = (self._vote_key(rel['from']), self._vote_key(rel['to']))
+                names.setdefault(pair[0], ' '.join(str(rel['from']).split()))
+                names.setdefault(pair[1], ' '.join(str(rel['to']).split()))
+                pairs.setdefault(pair, rel.get('type', 'connects'))
+            for pair, rel_type in pairs.items():
+                votes = relationship_votes.setdefault(pair, {})
+                votes[rel_type] = votes.get(rel_type, 0) + 1
+        
+        components = [names[key] for key, count in component_votes.items() if count >= quorum]
+        relationships = []
+        for (source, target), types in relationship_votes.items():
+            if sum(types.values()) >= quorum:
+                # max() keeps the first-seen type on a tie
+                rel_type = max(types, key=types.get)
+                relationships.append({'from': names[source], 'to': names[target], 'type': rel_type})
+        
+        return {
+            "components": components,
+            "relationships": relationships
+        }
+    
+    def _vote_key(self, name):
+        return ' '.join(str(name).lower().split())
+    
+    def _extract_hedged(self, provider, text):
+        """
+        Hedged request: query the primary provider; if it has not answered
+        within its p95 latency (or fails), race a backup - another available
+        provider, else the rule-based extractor - and take the first valid JSON.
+        A provider with an open circuit is skipped straight away.
+        """
+        # Unanswered calls keep running in the background (their responses
+        # still reach the LLM cache and the provider's latency/health record)
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='llm-hedge')
+        try:
+            pending = {self._submit_llm(executor, provider, text): provider}
+            done, _ = wait(pending, timeout=llm_clients.hedge_delay(provider, default=self.hedge_delay))
+            source, data = self._first_valid(done, pending)
+            if data is not None:
+                return self._enhance_extraction(data, text)
             
-            # Validate and enhance
-            return self._enhance_extraction(data, text)
+            backup = self._backup_provider(provider)
+            if backup is None:
+                return self._hedge_fallback(provider, text, pending)
             
+            tracing.annotate(hedged_to=backup)
+            pending[self._submit_llm(executor, backup, text)] = backup
+            deadline = time.monotonic() + self.hedge_timeout
+            while pending:
+                done, _ = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                source, data = self._first_valid(done, pending)
+                if data is not None:
+                    # The backup's answer is cached under the requested
+                    # provider's keys, so keep it out of those caches
+                    if source != provider:
+                        print(f"{provider.title()} slower than its hedge delay, using {source.title()}")
+                        self.degraded = True
+                    return self._enhance_extraction(data, text)
+            return self._hedge_fallback(provider, text, pending)
+        finally:
+            executor.shutdown(wait=False)
+    
+    def _submit_llm(self, executor, provider, text):
+        # Run in a copy of the caller's context so the call reports into its trace
+        return executor.submit(contextvars.copy_context().run, self._llm_data, provider, text)
+    
+    def _first_valid(self, done, pending):
+        """
+        (provider, parsed data) of the first finished call that returned
+        valid JSON, else (None, None); finished calls leave `pending`
+        """
+        for future in done:
+            provider = pending.pop(future)
+            try:
+                data = future.result()
+            except ProviderUnavailable as e:
+                print(f"{e}, hedging")
+                continue
+            except Exception as e:
+                print(f"{provider.title()} extraction error: {e}")
+                continue
+            if isinstance(data, dict) and isinstance(data.get('components'), list):
+                return provider, data
+            print(f"{provider.title()} returned no components list")
+        return None, None
+    
+    def _hedge_fallback(self, provider, text, pending):
+        """Rule-based answer once no provider delivered in time"""
+        if pending:
+            print(f"{provider.title()} slower than its hedge delay, using enhanced fallback")
+        tracing.annotate(hedged_to='fallback')
+        self.degraded = True
+        return self._extract_fallback(text)
+    
+    def _can_query(self, provider):
+        """Whether a provider call can reach the API (key set, not replaying recordings)"""
+        return self.is_configured(provider) and not (self.llm_cache and self.llm_cache.replay)
+    
+    def _backup_provider(self, provider):
+        """Another configured provider whose circuit is not open, or None"""
+        for other in self.MODELS:
+            if other != provider and llm_clients.is_available(other):
+                return other
+        return None
+    
+    def _llm_data(self, provider, text):
+        """
+        Parsed JSON answer for text from a provider (cached response first)
+        Raises ProviderUnavailable if the provider can't be called at all
+        """
+        prompt = self._build_prompt(text, provider)
+        model = self.MODELS[provider]
+        
+        result_text = self.llm_cache.get(provider, model, prompt) if self.llm_cache else None
+        if result_text is not None:
+            tracing.increment('llm_cache_hits')
+        elif self.llm_cache and self.llm_cache.replay:
+            raise ProviderUnavailable(f"No recorded {provider} response (replay mode)")
+        elif not self.is_configured(provider):
+            raise ProviderUnavailable(f"{self.API_KEY_ENV[provider]} not set")
+        elif not llm_clients.allow_request(provider):
+            # Circuit open: fail fast instead of waiting on a provider that keeps failing
+            tracing.increment('circuit_open')
+            raise RuntimeError(f"{provider} circuit open after repeated failures")
+        else:
+            query = self._query_gemini if provider == 'gemini' else self._query_cohere
+            result_text = query(prompt)
+            if self.llm_cache:
+                tracing.increment('llm_cache_misses')
+                self.llm_cache.put(provider, model, prompt, result_text)
+        
+        result_text = self._clean_json_response(result_text)
+        return json.loads(result_text)
+    
+    def _query_gemini(self, prompt):
+        """Send a prompt to Gemini and return the raw response text"""
+        return self._timed_query('gemini', lambda: llm_clients.get('gemini').generate_content(prompt).text)
+    
+    def _query_cohere(self, prompt):
+        """Send a prompt to Cohere and return the raw response text"""
+        return self._timed_query('cohere', lambda: llm_clients.get('cohere').generate(
+            model=self.MODELS['cohere'],
+            prompt=prompt,
+            max_tokens=1500,
+            temperature=0.3
+        ).generations[0].text)
+    
+    def _timed_query(self, provider, call):
+        """Run a provider call, recording its outcome in the client registry's health"""
+        started = time.monotonic()
+        try:
+            result = call()
         except Exception as e:
-            print(f"Cohere extraction error: {e}")
-            return self._extract_fallback(text)
+            llm_clients.record_failure(provider, e)
+            raise
+        llm_clients.record_success(provider, time.monotonic() - started)
+        return result
+    
+    def _build_prompt(self, text, provider):
+        """
+        Fill the provider's token budget with the best-ranked sentences
+        (TextCleaner emits sentences best first, joined by ". ")
+        Usage is kept in last_prompt_stats and reported on the trace span.
+        """
+        sentences = [s.strip() for s in text.split('. ') if s.strip()]
+        prompt, stats = PromptPacker(provider).pack(self.EXTRACTION_PROMPT, sentences)
+        
+        self.last_prompt_stats = stats
+        tracing.annotate(prompt_tokens=stats['used_tokens'], prompt_budget_tokens=stats['budget_tokens'])
+        return prompt
     
     def _extract_huggingface(self, text):
         """Extract using HuggingFace (enhanced rule-based for demo)"""
@@ -143,8 +439,8 @@ Return ONLY the JSON object, nothing else."""
         relationships = []
         
         # Step 1: Extract components using patterns (NER-style)
-        for pattern in self.COMPONENT_PATTERNS:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for regex in self.COMPONENT_REGEXES:
+            matches = regex.findall(text)
             for match in matches:
                 if isinstance(match, tuple):
                     # For patterns with groups, join them
@@ -180,8 +476,8 @@ Return ONLY the JSON object, nothing else."""
                 components.add(component)
         
         # Step 3: Extract relationships using patterns (dependency extraction)
-        for pattern, rel_type in self.RELATIONSHIP_PATTERNS:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for regex, rel_type in self.RELATIONSHIP_REGEXES:
+            matches = regex.findall(text)
             for match in matches:
                 if len(match) == 2:
                     from_comp = match[0].strip().title()
@@ -223,15 +519,16 @@ Return ONLY the JSON object, nothing else."""
         """Generate default relationships based on component types (architecture patterns)"""
         relationships = []
         
-        # Categorize components by type
-        clients = [c for c in components if any(x in c.lower() for x in ['client', 'user', 'frontend'])]
-        gateways = [c for c in components if 'gateway' in c.lower() or 'api' in c.lower()]
-        balancers = [c for c in components if 'balanc' in c.lower()]
-        services = [c for c in components if 'service' in c.lower() or 'server' in c.lower()]
-        databases = [c for c in components if any(x in c.lower() for x in ['database', 'db', 'mongo', 'sql', 'postgres', 'mysql', 'cassandra'])]
-        caches = [c for c in components if any(x in c.lower() for x in ['cache', 'redis'])]
-        queues = [c for c in components if any(x in c.lower() for x in ['queue', 'kafka', 'rabbit', 'sqs'])]
-        cdns = [c for c in components if 'cdn' in c.lower()]
+        # Categorize components by type (a component can have several roles)
+        roles = self.ROLE_CLASSIFIER.labels_batch(components)
+        clients = [c for c, r in zip(components, roles) if 'client' in r]
+        gateways = [c for c, r in zip(components, roles) if 'gateway' in r]
+        balancers = [c for c, r in zip(components, roles) if 'balancer' in r]
+        services = [c for c, r in zip(components, roles) if 'service' in r]
+        databases = [c for c, r in zip(components, roles) if 'database' in r]
+        caches = [c for c, r in zip(components, roles) if 'cache' in r]
+        queues = [c for c, r in zip(components, roles) if 'queue' in r]
+        cdns = [c for c, r in zip(components, roles) if 'cdn' in r]
         
         # Generate flow: Client → Gateway → Balancer → Services → Database/Cache/Queue
         
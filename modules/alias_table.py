@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class AliasTable:
+    """
+    Persistent raw name -> canonical component name table (LRU, JSON-backed)
+
+    Filled as names are normalized, so a name seen before resolves with a
+    dictionary lookup. The table is saved to and loaded from one JSON file,
+    at most once per save_interval and at shutdown; save() merges with what
+    is already on disk, so workers sharing the file add to it rather than
+    overwrite each other. export()/import_aliases() share a warm table
+    between workers. Entries
+    are only valid for the normalization rules that produced them, so the
+    file records a namespace (e.g. the normalizer's fingerprint) and a file
+    written under another namespace is ignored.
+    """
+
+    def __init__(self, path=os.path.join('cache', 'aliases.json'), max_entries=4096, namespace=None,
+                 save_interval=60):
+        """
+        path: JSON file to load from and save to (None = memory only)
+        namespace: identifies the rules the aliases were computed with
+        save_interval: minimum seconds between saves (unless forced)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self.save_interval = save_interval
+        self._aliases = OrderedDict()
+        self._dirty = False
+        self._last_save = time.time()
+        self._lock = threading.Lock()
+
+        if path:
+            self.load(path)
+
+    def __len__(self):
+        return len(self._aliases)
+
+    def get(self, raw):
+        """Canonical name recorded for a raw name, or None"""
+        with self._lock:
+            canonical = self._aliases.get(raw)
+            if canonical is not None:
+                self._aliases.move_to_end(raw)
+            return canonical
+
+    def put(self, raw, canonical):
+        """Record (or update) the canonical name for a raw name"""
+        with self._lock:
+            if self._aliases.get(raw) != canonical:
+                self._dirty = True
+            self._aliases[raw] = canonical
+            self._aliases.move_to_end(raw)
+            while len(self._aliases) > self.max_entries:
+                self._aliases.popitem(last=False)
+
+    def resolve(self, raw, compute):
+        """Canonical name for raw, calling compute(raw) and recording it on a miss"""
+        canonical = self.get(raw)
+        if canonical is None:
+            canonical = compute(raw)
+            self.put(raw, canonical)
+        return canonical
+
+    def export(self):
+        """Serializable snapshot: {'namespace', 'aliases'} (least recently used first)"""
+        with self._lock:
+            return {'namespace': self.namespace, 'aliases': dict(self._aliases)}
+
+    def import_aliases(self, data):
+        """
+        Merge an export() snapshot (or a plain raw -> canonical dict)
+        Returns the number of aliases imported (0 if the namespace differs)
+        """
+        if 'aliases' in data and isinstance(data['aliases'], dict):
+            if data.get('namespace') != self.namespace:
+                return 0
+            data = data['aliases']
+
+        count = 0
+        for raw, canonical in data.items():
+            if isinstance(raw, str) and isinstance(canonical, str):
+                self.put(raw, canonical)
+                count += 1
+        return count
+
+    def load(self, path=None):
+        """Merge aliases from a JSON file written by save(); returns the count loaded"""
+        path = path or self.path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+
+        with self._lock:
+            dirty = self._dirty
+        count = self.import_aliases(data)
+        with self._lock:
+            # Entries just read from disk don't need writing back
+            self._dirty = dirty
+        return count
+
+    def save(self, path=None, force=False):
+        """
+        Write the table to a JSON file (atomically) if it has new entries
+        and save_interval has passed since the last save (unless forced)
+        Aliases another worker saved under the same namespace are kept:
+        the file is re-read and merged, our entries winning on conflicts
+        """
+        path = path or self.path
+        if not path:
+            return False
+
+        now = time.time()
+        with self._lock:
+            if not (force or (self._dirty and now - self._last_save >= self.save_interval)):
+                return False
+            self._dirty = False
+            self._last_save = now
+
+        snapshot = self.export()
+        snapshot['aliases'] = self._merge_saved(path, snapshot['aliases'])
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Alias table save error: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+        return True
+
+    def _merge_saved(self, path, aliases):
+        """
+        Union of the file's aliases (same namespace only) and ours, ours
+        taking precedence and counting as most recently used; trimmed to
+        max_entries by dropping the least recently used
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return aliases
+
+        saved = data.get('aliases') if isinstance(data, dict) else None
+        if not isinstance(saved, dict) or data.get('namespace') != self.namespace:
+            return aliases
+
+        merged = {
+            raw: canonical for raw, canonical in saved.items()
+            if raw not in aliases and isinstance(raw, str) and isinstance(canonical, str)
+        }
+        merged.update(aliases)
+        overflow = len(merged) - self.max_entries
+        if overflow > 0:
+            merged = dict(list(merged.items())[overflow:])
+        return merged
+
+    def clear(self):
+        with self._lock:
+            self._aliases.clear()
+            self._dirty = True
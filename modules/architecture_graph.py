@@ -0,0 +1,271 @@
+from array import array
+
+class Node:
+    """One component of an ArchitectureGraph (a read-only view of its arrays)"""
+
+    __slots__ = ('id', 'name', 'shape', 'color', 'x', 'y')
+
+    def __init__(self, id, name, shape, color, x, y):
+        self.id = id
+        self.name = name
+        self.shape = shape
+        self.color = color
+        self.x = x
+        self.y = y
+
+    @property
+    def position(self):
+        return (self.x, self.y)
+
+class ArchitectureGraph:
+    """
+    Compact graph passed between the mapping, layout and rendering stages
+
+    Component names are interned to integer ids; per-node attributes
+    (shape code, colour index, x/y) and edges (from/to ids, type and arrow
+    style codes) live in typed arrays, so a graph is a handful of flat
+    buffers: cheap to pickle to a render process and walked by id instead
+    of looking names up in dicts. Converts to and from the dict shapes the
+    stages and /api/generate use (see from_dict / to_dict).
+    """
+
+    __slots__ = (
+        'names', 'is_component', 'shape_codes', 'color_codes', 'xs', 'ys', 'placed',
+        'edge_from', 'edge_to', 'edge_types', 'edge_styles',
+        'shapes', 'arrow_styles', 'colors', 'types', 'canvas_width', 'canvas_height',
+        '_ids', '_shape_ids', '_style_ids', '_color_ids', '_type_ids'
+    )
+
+    # Fixed codes for the mapper's shapes and arrow styles (index = code,
+    # -1 = none given); any other value is interned after them
+    SHAPES = ('rectangle', 'ellipse', 'cylinder', 'diamond', 'hexagon', 'parallelogram', 'cloud')
+    ARROW_STYLES = ('solid', 'dashed')
+
+    NO_CODE = -1
+
+    def __init__(self, canvas_width=None, canvas_height=None):
+        self.names = []
+        self.is_component = array('b')
+        self.shape_codes = array('h')
+        self.color_codes = array('h')
+        self.xs = array('i')
+        self.ys = array('i')
+        self.placed = array('b')
+
+        self.edge_from = array('i')
+        self.edge_to = array('i')
+        self.edge_types = array('h')
+        self.edge_styles = array('h')
+
+        # Interned shape, arrow-style, colour and relationship-type strings
+        self.shapes = list(self.SHAPES)
+        self.arrow_styles = list(self.ARROW_STYLES)
+        self.colors = []
+        self.types = []
+
+        self.canvas_width = canvas_width
+        self.canvas_height = canvas_height
+
+        self._ids = {}
+        self._shape_ids = {shape: code for code, shape in enumerate(self.shapes)}
+        self._style_ids = {style: code for code, style in enumerate(self.arrow_styles)}
+        self._color_ids = {}
+        self._type_ids = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def component_count(self):
+        return sum(self.is_component)
+
+    @property
+    def edge_count(self):
+        return len(self.edge_from)
+
+    def __getstate__(self):
+        # Lookup tables are rebuilt on load rather than pickled
+        return {
+            slot: getattr(self, slot) for slot in self.__slots__ if not slot.startswith('_')
+        }
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        self._ids = {name: node_id for node_id, name in enumerate(self.names)}
+        self._shape_ids = {shape: code for code, shape in enumerate(self.shapes)}
+        self._style_ids = {style: code for code, style in enumerate(self.arrow_styles)}
+        self._color_ids = {color: code for code, color in enumerate(self.colors)}
+        self._type_ids = {rel_type: code for code, rel_type in enumerate(self.types)}
+
+    def node_id(self, name):
+        """Interned id of a name, or None"""
+        return self._ids.get(name)
+
+    def add_node(self, name, shape=None, color=None, component=True):
+        """
+        Intern a node and return its id; adding a name again updates its
+        shape/colour and keeps its id. component=False marks a name that is
+        only referenced by a relationship.
+        """
+        node_id = self._ids.get(name)
+        if node_id is None:
+            node_id = len(self.names)
+            self._ids[name] = node_id
+            self.names.append(name)
+            self.is_component.append(0)
+            self.shape_codes.append(self.NO_CODE)
+            self.color_codes.append(self.NO_CODE)
+            self.xs.append(0)
+            self.ys.append(0)
+            self.placed.append(0)
+
+        if component:
+            self.is_component[node_id] = 1
+        if shape is not None:
+            self.shape_codes[node_id] = self._intern(shape, self.shapes, self._shape_ids)
+        if color is not None:
+            self.color_codes[node_id] = self._intern(color, self.colors, self._color_ids)
+        return node_id
+
+    def add_edge(self, source, target, rel_type='connects', arrow_style=None):
+        """Append an edge between two names (interned if new); returns its index"""
+        self.edge_from.append(self._ids[source] if source in self._ids else self.add_node(source, component=False))
+        self.edge_to.append(self._ids[target] if target in self._ids else self.add_node(target, component=False))
+        self.edge_types.append(self._intern(rel_type, self.types, self._type_ids))
+        self.edge_styles.append(
+            self._intern(arrow_style, self.arrow_styles, self._style_ids) if arrow_style is not None else self.NO_CODE
+        )
+        return len(self.edge_from) - 1
+
+    def add_edges(self, edges):
+        """
+        add_edge() for an iterable of (source, target, type, arrow_style)
+        tuples, appending each column in one pass
+        """
+        edges = list(edges)
+        ids = self._ids
+        for source, target, _, _ in edges:
+            if source not in ids:
+                self.add_node(source, component=False)
+            if target not in ids:
+                self.add_node(target, component=False)
+
+        type_ids = self._type_ids
+        style_ids = self._style_ids
+        self.edge_from.extend([ids[source] for source, _, _, _ in edges])
+        self.edge_to.extend([ids[target] for _, target, _, _ in edges])
+        self.edge_types.extend([
+            type_ids[rel_type] if rel_type in type_ids else self._intern(rel_type, self.types, type_ids)
+            for _, _, rel_type, _ in edges
+        ])
+        self.edge_styles.extend([
+            self.NO_CODE if style is None
+            else style_ids[style] if style in style_ids
+            else self._intern(style, self.arrow_styles, style_ids)
+            for _, _, _, style in edges
+        ])
+
+    def set_position(self, node_id, x, y):
+        self.xs[node_id] = x
+        self.ys[node_id] = y
+        self.placed[node_id] = 1
+
+    def nodes(self):
+        """Node records for the components, in insertion order"""
+        return [self.node(node_id) for node_id in range(len(self.names)) if self.is_component[node_id]]
+
+    def node(self, node_id):
+        shape_code = self.shape_codes[node_id]
+        color_code = self.color_codes[node_id]
+        return Node(
+            node_id,
+            self.names[node_id],
+            self.shapes[shape_code] if shape_code != self.NO_CODE else None,
+            self.colors[color_code] if color_code != self.NO_CODE else None,
+            self.xs[node_id],
+            self.ys[node_id]
+        )
+
+    def edges(self):
+        """(from_id, to_id, type, arrow_style) per edge, in insertion order"""
+        for index in range(len(self.edge_from)):
+            style_code = self.edge_styles[index]
+            yield (
+                self.edge_from[index],
+                self.edge_to[index],
+                self.types[self.edge_types[index]],
+                self.arrow_styles[style_code] if style_code != self.NO_CODE else None
+            )
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build from a stage's dict output: normalized (component names),
+        visual (components with shape/color, relationships with
+        arrow_style) or positioned (plus positions and canvas size)
+        """
+        graph = cls(data.get('canvas_width'), data.get('canvas_height'))
+
+        for comp in data.get('components', []):
+            if isinstance(comp, dict):
+                graph.add_node(comp['name'], comp.get('shape'), comp.get('color'))
+            else:
+                graph.add_node(comp)
+
+        for rel in data.get('relationships', []):
+            graph.add_edge(rel['from'], rel['to'], rel.get('type', 'connects'), rel.get('arrow_style'))
+
+        for name, (x, y) in data.get('positions', {}).items():
+            node_id = graph._ids.get(name)
+            if node_id is None:
+                node_id = graph.add_node(name, component=False)
+            graph.set_position(node_id, x, y)
+
+        return graph
+
+    @classmethod
+    def coerce(cls, data):
+        """Return data as an ArchitectureGraph (converting a stage dict)"""
+        return data if isinstance(data, cls) else cls.from_dict(data)
+
+    def to_dict(self):
+        """
+        The dict shape this graph was built from: visual components when
+        shapes are set, positions and canvas size when laid out
+        """
+        visual = any(code != self.NO_CODE for code in self.shape_codes)
+        components = []
+        for node_id, name in enumerate(self.names):
+            if not self.is_component[node_id]:
+                continue
+            if visual:
+                node = self.node(node_id)
+                components.append({'name': name, 'shape': node.shape, 'color': node.color})
+            else:
+                components.append(name)
+
+        relationships = []
+        for source, target, rel_type, arrow_style in self.edges():
+            rel = {'from': self.names[source], 'to': self.names[target], 'type': rel_type}
+            if arrow_style is not None:
+                rel['arrow_style'] = arrow_style
+            relationships.append(rel)
+
+        data = {'components': components, 'relationships': relationships}
+        if self.canvas_width is not None:
+            data['positions'] = {
+                self.names[node_id]: (self.xs[node_id], self.ys[node_id])
+                for node_id in range(len(self.names)) if self.placed[node_id]
+            }
+            data['canvas_width'] = self.canvas_width
+            data['canvas_height'] = self.canvas_height
+        return data
+
+    def _intern(self, value, values, ids):
+        code = ids.get(value)
+        if code is None:
+            code = len(values)
+            ids[value] = code
+            values.append(value)
+        return code
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+class ArtifactStore:
+    """Content-addressed artifact files with atomic writes and retention GC"""
+
+    # Names save() writes (<prefix>_<16 hex>.<ext>); GC leaves every other
+    # file in output_dir alone (batch manifests, in-flight *.tmp writes)
+    ARTIFACT_PATTERN = re.compile(r'^\w+_[0-9a-f]{16}\.(png|gif)$')
+
+    def __init__(self, output_dir, retention=86400, max_files=1000, gc_interval=300):
+        """
+        retention: seconds an artifact is kept after its last write
+        max_files: upper bound on artifacts kept in output_dir
+        gc_interval: minimum seconds between garbage collection passes
+        """
+        self.output_dir = output_dir
+        self.retention = retention
+        self.max_files = max_files
+        self.gc_interval = gc_interval
+        self._last_gc = 0
+        self._gc_lock = threading.Lock()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def save(self, data, prefix, ext):
+        """
+        Write bytes under a content-hashed name, e.g. architecture_<hash>.png
+        Identical content maps to the same file, so concurrent requests never
+        clobber each other's artifacts
+        """
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        filepath = os.path.join(self.output_dir, f"{prefix}_{digest}.{ext}")
+
+        if os.path.exists(filepath):
+            # Same content already on disk: refresh its age for the GC
+            try:
+                os.utime(filepath)
+                return filepath
+            except FileNotFoundError:
+                # Collected between the check and the touch: write it again
+                pass
+
+        tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+
+        return filepath
+
+    def collect_garbage(self, force=False):
+        """
+        Delete artifacts older than the retention window and the oldest ones
+        beyond max_files (runs at most once per gc_interval unless forced)
+        Only files named like save()'s output are considered
+        Returns the number of files removed
+        """
+        now = time.time()
+        with self._gc_lock:
+            if not force and now - self._last_gc < self.gc_interval:
+                return 0
+            self._last_gc = now
+
+        files = []
+        for filename in os.listdir(self.output_dir):
+            if not self.ARTIFACT_PATTERN.match(filename):
+                continue
+            path = os.path.join(self.output_dir, filename)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if os.path.isfile(path):
+                files.append((mtime, path))
+
+        files.sort(reverse=True)
+        removed = 0
+        for index, (mtime, path) in enumerate(files):
+            if now - mtime > self.retention or index >= self.max_files:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+
+        return removed
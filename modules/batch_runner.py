@@ -0,0 +1,176 @@
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from modules.input_handler import InputHandler
+from modules.image_generator import ImageGenerator
+from modules.gif_generator import GIFGenerator
+from modules.architecture_graph import ArchitectureGraph
+from modules import tracing
+
+def _render_artifacts(graph, output_dir, metadata, generate_gif):
+    """
+    Render PNG (and optional GIF) in a worker process from an ArchitectureGraph
+    Module-level so ProcessPoolExecutor can pickle it
+    """
+    image_path = ImageGenerator().generate(graph, output_dir, metadata)
+    gif_path = GIFGenerator().generate(graph, output_dir) if generate_gif else None
+    return image_path, gif_path
+
+class BatchRunner:
+    """Batch generation for many configs (pre-warming caches and artifacts)"""
+
+    def __init__(self, pipeline, max_workers=4, render_workers=None):
+        """
+        pipeline: VisualizationPipeline (its stage cache shares scrape results)
+        max_workers: threads for the I/O-bound steps (scrape, LLM extraction)
+        render_workers: processes for the CPU-bound render steps (None = CPU count)
+        """
+        self.pipeline = pipeline
+        self.max_workers = max_workers
+        self.render_workers = render_workers
+
+    def run(self, requests_data, manifest_path=None):
+        """
+        Run every request (dicts shaped like the /api/generate body)
+        Returns the manifest dict and writes it to manifest_path if given
+        """
+        started_at = time.time()
+        input_handler = InputHandler()
+
+        entries = []
+        unique_configs = {}
+        for data in requests_data:
+            entry = {'request': data, 'status': 'pending'}
+            entries.append(entry)
+            try:
+                config = input_handler.validate_and_parse(data)
+            except Exception as e:
+                entry.update(status='invalid', error=str(e))
+                continue
+
+            # Identical configs are generated once and share the result
+            key = json.dumps(config, sort_keys=True, default=str)
+            entry['config'] = config
+            entry['key'] = key
+            unique_configs.setdefault(key, config)
+
+        results = self._run_unique(unique_configs)
+
+        for entry in entries:
+            key = entry.pop('key', None)
+            if key is not None:
+                entry.update(results[key])
+
+        manifest = {
+            'started_at': started_at,
+            'finished_at': time.time(),
+            'duration': round(time.time() - started_at, 3),
+            'total': len(entries),
+            'unique': len(unique_configs),
+            'succeeded': sum(1 for e in entries if e['status'] in ('generated', 'cached')),
+            'failed': sum(1 for e in entries if e['status'] in ('failed', 'invalid')),
+            'results': entries
+        }
+
+        if manifest_path:
+            self._write_manifest(manifest, manifest_path)
+
+        return manifest
+
+    def _run_unique(self, configs):
+        """Generate each unique config; returns key -> result fields"""
+        results = {}
+        pending = {}
+
+        # Cache hits need no work at all
+        for key, config in configs.items():
+            cached = self.pipeline.load_cached_result(config)
+            if cached:
+                results[key] = self._result_fields('cached', cached)
+            else:
+                pending[key] = config
+
+        if not pending:
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as threads:
+            # Scrape each distinct article set once (HLD and LLD of a topic share URLs)
+            url_sets = {}
+            for config in pending.values():
+                urls = self.pipeline.find_articles(config)
+                url_sets.setdefault(tuple(urls), urls)
+            list(threads.map(self.pipeline.scrape, url_sets.values()))
+
+            # Steps 2-8 per config; scraping now hits the stage cache
+            analyses = dict(zip(
+                pending.keys(),
+                threads.map(self._safe_analyze, pending.values())
+            ))
+
+        # Steps 9-10 are CPU-bound: render in a process pool. Workers are
+        # spawned, not forked: forking a process that runs other threads (job
+        # workers, LLM clients) can leave a child stuck on a copied lock
+        with ProcessPoolExecutor(
+            max_workers=self.render_workers, mp_context=multiprocessing.get_context('spawn')
+        ) as processes:
+            futures = {}
+            for key, config in pending.items():
+                analysis = analyses[key]
+                if isinstance(analysis, Exception):
+                    results[key] = {'status': 'failed', 'error': str(analysis)}
+                    continue
+
+                metadata = {'topic': config['topic'], 'design': config['design']}
+                # The compact graph pickles to a fraction of the dict's size
+                futures[key] = processes.submit(
+                    _render_artifacts,
+                    ArchitectureGraph.coerce(analysis['positioned_data']),
+                    self.pipeline.output_dir,
+                    metadata,
+                    config.get('generate_gif', False)
+                )
+
+            for key, future in futures.items():
+                try:
+                    image_path, gif_path = future.result()
+                    result = self.pipeline.store_result(pending[key], analyses[key], image_path, gif_path)
+                    results[key] = self._result_fields('generated', result)
+                except Exception as e:
+                    traceback.print_exc()
+                    results[key] = {'status': 'failed', 'error': str(e)}
+
+        return results
+
+    def _safe_analyze(self, config):
+        """Run steps 2-8, returning the exception instead of raising"""
+        try:
+            # Per-config trace so batch runs show up in the stage metrics
+            with tracing.use_trace(tracing.Trace()):
+                return self.pipeline.analyze(config)
+        except Exception as e:
+            traceback.print_exc()
+            return e
+
+    def _result_fields(self, status, result):
+        """Manifest fields for a finished config"""
+        return {
+            'status': status,
+            'image_path': result['image_path'],
+            'gif_path': result['gif_path'],
+            'components': len(result['components']),
+            'relationships': len(result['relationships'])
+        }
+
+    def _write_manifest(self, manifest, manifest_path):
+        """Write the manifest JSON atomically"""
+        directory = os.path.dirname(manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
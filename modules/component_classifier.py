@@ -0,0 +1,68 @@
+from modules.keyword_matcher import KeywordMatcher
+
+class ComponentClassifier:
+    """
+    Precompiled keyword classifier for component names
+
+    Rules are ordered (keyword, label) pairs; a name matches a keyword if
+    the keyword occurs in it (case-insensitive). The first matching rule in
+    the given order wins for classify(), which is the explicit priority;
+    labels() gives every matching label. All keywords are scanned in one
+    KeywordMatcher pass, and results are memoized per name.
+    """
+
+    def __init__(self, rules, default=None, max_entries=4096):
+        """
+        rules: iterable of (keyword, label) pairs (or a dict) in priority order
+        default: classify() result when no keyword matches
+        """
+        rules = list(rules.items() if isinstance(rules, dict) else rules)
+        self.default = default
+        self.max_entries = max_entries
+
+        self._priority = {}
+        self._label = {}
+        for priority, (keyword, label) in enumerate(rules):
+            keyword = keyword.lower()
+            if keyword not in self._priority:
+                self._priority[keyword] = priority
+                self._label[keyword] = label
+
+        self._matcher = KeywordMatcher(self._priority)
+        self._memo = {}
+
+    def classify(self, name):
+        """Label of the highest-priority keyword in name, or the default"""
+        return self._lookup(name)[0]
+
+    def labels(self, name):
+        """Frozen set of every label whose keyword occurs in name"""
+        return self._lookup(name)[1]
+
+    def classify_batch(self, names):
+        """classify() for each name (each distinct name is scanned once)"""
+        return [self._lookup(name)[0] for name in names]
+
+    def labels_batch(self, names):
+        """labels() for each name (each distinct name is scanned once)"""
+        return [self._lookup(name)[1] for name in names]
+
+    def _lookup(self, name):
+        result = self._memo.get(name)
+        if result is None:
+            result = self._result(self._matcher.matches(name.lower()))
+            self._remember(name, result)
+        return result
+
+    def _result(self, keywords):
+        """(primary label, all labels) for a set of matched keywords"""
+        if not keywords:
+            return self.default, frozenset()
+        primary = min(keywords, key=self._priority.__getitem__)
+        return self._label[primary], frozenset(self._label[keyword] for keyword in keywords)
+
+    def _remember(self, name, result):
+        if len(self._memo) >= self.max_entries:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._memo.pop(next(iter(self._memo)), None)
+        self._memo[name] = result
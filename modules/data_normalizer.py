@@ -1,9 +1,53 @@
+import os
 import re
-from difflib import SequenceMatcher
+from modules.fuzzy_index import FuzzyIndex
 
 class DataNormalizer:
     """Step 6: Data Normalization Module"""
     
+    # SequenceMatcher ratio above which a component duplicates an earlier one
+    DUPLICATE_THRESHOLD = 0.8
+    
+    # Ratio above which a relationship endpoint matches a component
+    MATCH_THRESHOLD = 0.75
+    
+    # Canonical names for common raw spellings (keys lowercased, single-spaced);
+    # anything else goes through the title-case rules in _normalize_name
+    SEED_ALIASES = {
+        'db': 'Database',
+        'lb': 'Load Balancer',
+        'api gw': 'API Gateway',
+        'redis': 'Redis',
+        'redis cache': 'Redis',
+        'redis server': 'Redis',
+        'mysql': 'MySQL',
+        'mysql db': 'MySQL',
+        'mysql database': 'MySQL',
+        'postgres': 'PostgreSQL',
+        'postgresql': 'PostgreSQL',
+        'postgres db': 'PostgreSQL',
+        'mongo': 'MongoDB',
+        'mongodb': 'MongoDB',
+        'dynamodb': 'DynamoDB',
+        'rabbitmq': 'RabbitMQ',
+        'kafka broker': 'Kafka',
+        'elastic search': 'Elasticsearch',
+        'haproxy': 'HAProxy',
+        'k8s': 'Kubernetes'
+    }
+    
+    def __init__(self, alias_table=None, clustering=None):
+        """
+        alias_table: optional AliasTable caching raw -> canonical names
+        clustering: merge similar components with union-find clusters and
+        deterministic representatives instead of greedy first-match
+        (independent of input order; NORMALIZER_CLUSTERING)
+        """
+        self.alias_table = alias_table
+        if clustering is None:
+            clustering = os.getenv('NORMALIZER_CLUSTERING', 'false').lower() in ('1', 'true', 'yes')
+        self.clustering = clustering
+    
     def normalize(self, raw_data):
         """
         Normalize extracted data:
@@ -11,11 +55,20 @@ class DataNormalizer:
         - Normalize names
         - Validate relationships
         """
-        components = self._normalize_components(raw_data.get('components', []))
+        aliases = None
+        if self.clustering:
+            components, aliases = self.cluster_components(raw_data.get('components', []))
+        else:
+            components = self._normalize_components(raw_data.get('components', []))
         relationships = self._normalize_relationships(
             raw_data.get('relationships', []),
-            components
+            components,
+            aliases
         )
+        if self.clustering:
+            # Input order must not matter: relationships are deduplicated on
+            # (from, to, type), so this order is total
+            relationships.sort(key=lambda rel: (rel['from'], rel['to'], rel['type']))
         
         return {
             "components": components,
@@ -27,7 +80,7 @@ class DataNormalizer:
         Remove duplicates and normalize component names
         """
         normalized = []
-        seen_lower = {}
+        seen_lower = FuzzyIndex(self.DUPLICATE_THRESHOLD)
         
         for comp in components:
             # Clean up component name
@@ -36,30 +89,91 @@ class DataNormalizer:
                 continue
             
             # Normalize
-            comp = self._normalize_name(comp)
+            comp = self._canonical_name(comp)
             comp_lower = comp.lower()
             
             # Check for similar existing components
-            similar_found = False
-            for existing_lower, existing_name in seen_lower.items():
-                if self._is_similar(comp_lower, existing_lower):
-                    similar_found = True
-                    break
+            similar_found = seen_lower.find(comp_lower) is not None
             
             if not similar_found:
                 normalized.append(comp)
-                seen_lower[comp_lower] = comp
+                seen_lower.add(comp_lower, comp)
         
         return normalized
     
-    def _normalize_relationships(self, relationships, valid_components):
+    def cluster_components(self, components):
+        """
+        Order-independent dedupe: every pair of canonical names with a
+        similarity ratio above DUPLICATE_THRESHOLD is joined (union-find over
+        the fuzzy index, names compared in sorted order), and each cluster is
+        represented by its most frequent name (then shortest, then
+        alphabetical). Clusters are single-linkage: A~B and B~C merge A and C.
+        Returns (components sorted by name, {raw name: representative})
+        """
+        names = {}
+        counts = {}
+        raw_keys = {}
+        for comp in components:
+            raw = str(comp).strip()
+            if not raw:
+                continue
+            
+            name = self._canonical_name(raw)
+            key = name.lower()
+            names[key] = min(names.get(key, name), name)
+            counts[key] = counts.get(key, 0) + 1
+            raw_keys[raw] = key
+        
+        keys = sorted(names)
+        parent = list(range(len(keys)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        index = FuzzyIndex(self.DUPLICATE_THRESHOLD)
+        for i, key in enumerate(keys):
+            for j in index.find_all(key):
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    # Smaller index as root keeps the structure deterministic
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+            index.add(key, i)
+        
+        clusters = {}
+        for i, key in enumerate(keys):
+            clusters.setdefault(find(i), []).append(key)
+        
+        representative = {}
+        for members in clusters.values():
+            best = min(members, key=lambda k: (-counts[k], len(k), k))
+            for key in members:
+                representative[key] = names[best]
+        
+        normalized = sorted(set(representative.values()), key=lambda name: (name.lower(), name))
+        aliases = {raw: representative[key] for raw, key in raw_keys.items()}
+        return normalized, aliases
+    
+    def _normalize_relationships(self, relationships, valid_components, aliases=None):
         """
         Validate and normalize relationships
+        aliases: raw name -> component from cluster_components; those
+        endpoints resolve with a lookup instead of a fuzzy match
         """
         normalized = []
         seen = set()
+        aliases = dict(aliases or {})
         
-        valid_comp_set = {c.lower(): c for c in valid_components}
+        valid_comp_set = FuzzyIndex(self.MATCH_THRESHOLD)
+        for c in valid_components:
+            valid_comp_set.add(c.lower(), c)
+        # Clustered-away names still match their representative
+        for raw in sorted(aliases):
+            key = self._canonical_name(raw).lower()
+            if key not in valid_comp_set:
+                valid_comp_set.add(key, aliases[raw])
         
         for rel in relationships:
             if not isinstance(rel, dict):
@@ -72,13 +186,9 @@ class DataNormalizer:
             if not from_comp or not to_comp:
                 continue
             
-            # Normalize names
-            from_comp = self._normalize_name(from_comp)
-            to_comp = self._normalize_name(to_comp)
-            
-            # Find matching valid components
-            from_match = self._find_matching_component(from_comp, valid_comp_set)
-            to_match = self._find_matching_component(to_comp, valid_comp_set)
+            # Normalize names and find matching valid components
+            from_match = self._resolve_endpoint(from_comp, valid_comp_set, aliases)
+            to_match = self._resolve_endpoint(to_comp, valid_comp_set, aliases)
             
             if not from_match or not to_match:
                 continue
@@ -97,6 +207,27 @@ class DataNormalizer:
         
         return normalized
     
+    def _resolve_endpoint(self, raw, valid_components_index, aliases):
+        """Component a relationship endpoint refers to (memoized in aliases), or None"""
+        if raw in aliases:
+            return aliases[raw]
+        match = self._find_matching_component(self._canonical_name(raw), valid_components_index)
+        aliases[raw] = match
+        return match
+    
+    def _canonical_name(self, name):
+        """
+        Canonical component name: a seed alias if one matches, otherwise
+        _normalize_name (looked up in the alias table when there is one)
+        """
+        if self.alias_table is None:
+            return self._compute_canonical(name)
+        return self.alias_table.resolve(name, self._compute_canonical)
+    
+    def _compute_canonical(self, name):
+        alias = self.SEED_ALIASES.get(' '.join(name.lower().split()))
+        return alias if alias is not None else self._normalize_name(name)
+    
     def _normalize_name(self, name):
         """
         Normalize component name
@@ -113,25 +244,15 @@ class DataNormalizer:
         
         return name
     
-    def _is_similar(self, str1, str2, threshold=0.8):
+    def _find_matching_component(self, name, valid_components_index):
         """
-        Check if two strings are similar using sequence matching
-        """
-        return SequenceMatcher(None, str1, str2).ratio() > threshold
-    
-    def _find_matching_component(self, name, valid_components_dict):
-        """
-        Find matching component from valid list
+        Find matching component from valid list (a FuzzyIndex of lowercased names)
         """
         name_lower = name.lower()
         
         # Exact match
-        if name_lower in valid_components_dict:
-            return valid_components_dict[name_lower]
+        if name_lower in valid_components_index:
+            return valid_components_index.get(name_lower)
         
         # Similarity match
-        for valid_lower, valid_name in valid_components_dict.items():
-            if self._is_similar(name_lower, valid_lower, threshold=0.75):
-                return valid_name
-        
-        return None
+        return valid_components_index.find(name_lower)
@@ -0,0 +1,121 @@
+from difflib import SequenceMatcher
+import numpy as np
+
+class FuzzyIndex:
+    """
+    Insertion-ordered string index for "first key whose SequenceMatcher
+    ratio with the query exceeds the threshold"
+
+    Gives exactly the answer of a linear scan calling
+    SequenceMatcher(None, query, key).ratio() > threshold over the keys in
+    insertion order, but prunes with two upper bounds of ratio() before
+    computing it:
+    - length: ratio <= 2 * min(len) / (len(query) + len(key))
+    - character bag: ratio <= quick_ratio() = 2 * |common chars| / total,
+      computed for all candidates at once from per-key character counts
+    Each key keeps a SequenceMatcher with the key preloaded as the second
+    sequence, so its lookup tables are built once instead of per comparison.
+    """
+
+    MIN_VECTORIZED = 16
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self._keys = []
+        self._values = []
+        self._ids = {}
+        self._matchers = []
+        self._by_length = {}
+        self._alphabet = {}
+        self._counts = np.zeros((16, 8), dtype=np.int32)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._ids
+
+    def add(self, key, value):
+        """Add a key (re-adding one keeps its position and replaces its value)"""
+        if key in self._ids:
+            self._values[self._ids[key]] = value
+            return
+
+        index = len(self._keys)
+        self._ids[key] = index
+        self._keys.append(key)
+        self._values.append(value)
+        self._by_length.setdefault(len(key), []).append(index)
+
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(key)
+        self._matchers.append(matcher)
+
+        columns = [self._alphabet.setdefault(char, len(self._alphabet)) for char in key]
+        self._grow(index + 1, len(self._alphabet))
+        np.add.at(self._counts[index], columns, 1)
+
+    def get(self, key, default=None):
+        """Value stored under exactly `key`"""
+        index = self._ids.get(key)
+        return default if index is None else self._values[index]
+
+    def find(self, query):
+        """Value of the earliest added key with ratio(query, key) > threshold, or None"""
+        candidates = self._candidates(query)
+        for index in candidates:
+            matcher = self._matchers[index]
+            matcher.set_seq1(query)
+            if matcher.ratio() > self.threshold:
+                return self._values[index]
+        return None
+
+    def find_all(self, query):
+        """Values of every key with ratio(query, key) > threshold, in insertion order"""
+        matches = []
+        for index in self._candidates(query):
+            matcher = self._matchers[index]
+            matcher.set_seq1(query)
+            if matcher.ratio() > self.threshold:
+                matches.append(self._values[index])
+        return matches
+
+    def _candidates(self, query):
+        """Ids passing both upper bounds, in insertion order"""
+        query_length = len(query)
+        ids = []
+        for length, bucket in self._by_length.items():
+            if self._bound(min(query_length, length), query_length + length) > self.threshold:
+                ids.extend(bucket)
+        ids.sort()
+        # Below this the vectorized bound costs more than the ratios it saves
+        if len(ids) < self.MIN_VECTORIZED:
+            return ids
+
+        query_counts = np.zeros(len(self._alphabet), dtype=np.int32)
+        columns = [self._alphabet[char] for char in query if char in self._alphabet]
+        np.add.at(query_counts, columns, 1)
+
+        ids = np.array(ids)
+        common = np.minimum(self._counts[ids, :len(query_counts)], query_counts).sum(axis=1)
+        totals = np.array([query_length + len(self._keys[index]) for index in ids])
+        # Same float arithmetic as SequenceMatcher.ratio(), so the bound is exact
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bounds = np.where(totals > 0, 2.0 * common / totals, 1.0)
+        return ids[bounds > self.threshold].tolist()
+
+    def _bound(self, matches, total):
+        return 2.0 * matches / total if total else 1.0
+
+    def _grow(self, rows, columns):
+        """Make room in the character-count matrix (capacity doubles)"""
+        capacity_rows, capacity_columns = self._counts.shape
+        if rows <= capacity_rows and columns <= capacity_columns:
+            return
+        while capacity_rows < rows:
+            capacity_rows *= 2
+        while capacity_columns < columns:
+            capacity_columns *= 2
+        counts = np.zeros((capacity_rows, capacity_columns), dtype=np.int32)
+        counts[:self._counts.shape[0], :self._counts.shape[1]] = self._counts
+        self._counts = counts
@@ -1,5 +1,7 @@
 from PIL import Image, ImageDraw, ImageFont
-import os
+from io import BytesIO
+from modules.artifact_store import ArtifactStore
+from modules.architecture_graph import ArchitectureGraph
 import math
 
 class GIFGenerator:
@@ -14,18 +16,24 @@ class GIFGenerator:
     def generate(self, positioned_data, output_dir):
         """
         Generate animated GIF showing data flow
+        positioned_data: LayoutEngine output dict or an ArchitectureGraph
         """
-        width = positioned_data['canvas_width']
-        height = positioned_data['canvas_height']
+        graph = ArchitectureGraph.coerce(positioned_data)
+        width = graph.canvas_width
+        height = graph.canvas_height
         
         try:
             font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", self.font_size)
         except:
             font = ImageFont.load_default()
         
-        positions = positioned_data['positions']
-        components = positioned_data['components']
-        relationships = positioned_data['relationships']
+        placed = graph.placed
+        nodes = [node for node in graph.nodes() if placed[node.id]]
+        edges = [
+            (index, (graph.xs[source], graph.ys[source]), (graph.xs[target], graph.ys[target]))
+            for index, (source, target, _, _) in enumerate(graph.edges())
+            if placed[source] and placed[target]
+        ]
         
         frames = []
         
@@ -35,45 +43,43 @@ class GIFGenerator:
             draw = ImageDraw.Draw(img)
             
             # Draw components
-            for comp in components:
-                if comp['name'] in positions:
-                    self._draw_component(
-                        draw,
-                        positions[comp['name']],
-                        comp['name'],
-                        comp['shape'],
-                        comp['color'],
-                        font
-                    )
+            for node in nodes:
+                self._draw_component(
+                    draw,
+                    node.position,
+                    node.name,
+                    node.shape,
+                    node.color,
+                    font
+                )
             
             # Draw animated relationships
-            for rel_idx, rel in enumerate(relationships):
-                if rel['from'] in positions and rel['to'] in positions:
-                    # Stagger animations
-                    rel_progress = (frame_idx - rel_idx * 3) / self.num_frames
-                    if rel_progress > 0:
-                        self._draw_animated_arrow(
-                            draw,
-                            positions[rel['from']],
-                            positions[rel['to']],
-                            min(rel_progress, 1.0)
-                        )
+            for rel_idx, from_pos, to_pos in edges:
+                # Stagger animations
+                rel_progress = (frame_idx - rel_idx * 3) / self.num_frames
+                if rel_progress > 0:
+                    self._draw_animated_arrow(
+                        draw,
+                        from_pos,
+                        to_pos,
+                        min(rel_progress, 1.0)
+                    )
             
             frames.append(img)
         
-        # Save GIF
-        filename = 'architecture.gif'
-        filepath = os.path.join(output_dir, filename)
+        # Save GIF under a content-hashed name (atomic write)
+        buffer = BytesIO()
         
         frames[0].save(
-            filepath,
+            buffer,
+            format='GIF',
             save_all=True,
             append_images=frames[1:],
             duration=100,
             loop=0
         )
         
-        return filepath
+        return ArtifactStore(output_dir).save(buffer.getvalue(), 'architecture', 'gif')
     
     def _draw_component(self, draw, position, name, shape, color, font):
         """Draw component (same as ImageGenerator)"""
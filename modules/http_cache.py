@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class HTTPCache:
+    """Persistent conditional-GET cache (ETag / Last-Modified) for fetched pages (LRU-bounded)"""
+
+    def __init__(self, cache_dir=os.path.join('cache', 'http'), max_age=3600, stale_if_error=86400,
+                 max_entries=512):
+        """
+        max_age: seconds a stored page is served without contacting the origin
+        stale_if_error: extra seconds a stale page may be served when the origin fails
+        max_entries: pages kept on disk; the least recently used are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.stale_if_error = stale_if_error
+        self.max_entries = max_entries
+        # Key -> None in least-recently-used order
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._load_index()
+
+    def get(self, url):
+        """
+        Return stored metadata for url, or None
+        Entry format: {'url', 'etag', 'last_modified', 'fetched_at', 'text', 'parser_version'}
+        """
+        try:
+            with open(self._meta_path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        self._touch(self._key(url))
+        return entry
+
+    def is_fresh(self, entry):
+        """Check whether an entry can be served without revalidation"""
+        return time.time() - entry.get('fetched_at', 0) <= self.max_age
+
+    def is_usable_stale(self, entry):
+        """Check whether an entry can still be served when the origin is failing"""
+        return time.time() - entry.get('fetched_at', 0) <= self.max_age + self.stale_if_error
+
+    def conditional_headers(self, entry):
+        """Build If-None-Match / If-Modified-Since headers for revalidation"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load_body(self, url):
+        """Return the stored raw body for url, or None"""
+        try:
+            with open(self._body_path(url), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, url, body, headers, text, parser_version):
+        """
+        Store a 200 response body, its validators and the extracted text
+        """
+        self._atomic_write(self._body_path(url), body)
+        entry = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+            'text': text,
+            'parser_version': parser_version
+        }
+        self._write_meta(url, entry)
+        return entry
+
+    def revalidated(self, entry, headers, text=None, parser_version=None):
+        """
+        Refresh an entry after a 304 Not Modified response
+        Optionally replaces the extracted text (e.g. after a parser upgrade)
+        """
+        entry = dict(entry)
+        entry['fetched_at'] = time.time()
+        entry['etag'] = headers.get('ETag') or entry.get('etag')
+        entry['last_modified'] = headers.get('Last-Modified') or entry.get('last_modified')
+        if text is not None:
+            entry['text'] = text
+            entry['parser_version'] = parser_version
+        self._write_meta(entry['url'], entry)
+        return entry
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _meta_path(self, url):
+        return os.path.join(self.cache_dir, f"{self._key(url)}.json")
+
+    def _body_path(self, url):
+        return os.path.join(self.cache_dir, f"{self._key(url)}.body")
+
+    def _write_meta(self, url, entry):
+        self._atomic_write(self._meta_path(url), json.dumps(entry).encode('utf-8'))
+        self._touch(self._key(url))
+
+    def _touch(self, key):
+        """Mark an entry most recently used and evict beyond max_entries"""
+        with self._lock:
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                oldest_key, _ = self._entries.popitem(last=False)
+                self._evict(oldest_key)
+
+    def _evict(self, key):
+        """Remove an entry's metadata and body files"""
+        for ext in ('json', 'body'):
+            try:
+                os.remove(os.path.join(self.cache_dir, f"{key}.{ext}"))
+            except OSError:
+                pass
+
+    def _load_index(self):
+        """
+        Rebuild the LRU order from entries left by previous runs (by last
+        write) and drop the oldest beyond max_entries
+        """
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                mtime = os.path.getmtime(os.path.join(self.cache_dir, filename))
+            except OSError:
+                continue
+            entries.append((mtime, filename[:-len('.json')]))
+
+        entries.sort()
+        for _, key in entries:
+            self._touch(key)
+
+    def _atomic_write(self, path, data):
+        """Write bytes via temp file + rename so readers never see partial data"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
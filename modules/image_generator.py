@@ -1,5 +1,7 @@
 from PIL import Image, ImageDraw, ImageFont
-import os
+from io import BytesIO
+from modules.artifact_store import ArtifactStore
+from modules.architecture_graph import ArchitectureGraph
 import math
 
 class ImageGenerator:
@@ -13,10 +15,12 @@ class ImageGenerator:
     def generate(self, positioned_data, output_dir, metadata=None):
         """
         Generate architecture diagram image with metadata
+        positioned_data: LayoutEngine output dict or an ArchitectureGraph
         metadata: dict with 'topic' and 'design' info
         """
-        width = positioned_data['canvas_width']
-        height = positioned_data['canvas_height']
+        graph = ArchitectureGraph.coerce(positioned_data)
+        width = graph.canvas_width
+        height = graph.canvas_height
         
         # Add space for header if metadata provided
         header_height = 80 if metadata else 0
@@ -56,46 +60,37 @@ class ImageGenerator:
             sub_width = bbox_sub[2] - bbox_sub[0]
             draw.text(((width - sub_width) // 2, 50), subtitle, fill='#95A5A6', font=font_small)
         
-        positions = positioned_data['positions']
-        components = positioned_data['components']
-        relationships = positioned_data['relationships']
+        xs, ys, placed = graph.xs, graph.ys, graph.placed
         
-        # Adjust positions if we have a header
-        if header_height:
-            adjusted_positions = {name: (x, y + header_height) for name, (x, y) in positions.items()}
-        else:
-            adjusted_positions = positions
-        
-        # Draw relationships first (behind components)
-        for rel in relationships:
-            if rel['from'] in adjusted_positions and rel['to'] in adjusted_positions:
+        # Draw relationships first (behind components); positions shift down by the header
+        for source, target, rel_type, arrow_style in graph.edges():
+            if placed[source] and placed[target]:
                 self._draw_arrow(
                     draw,
-                    adjusted_positions[rel['from']],
-                    adjusted_positions[rel['to']],
-                    rel.get('arrow_style', 'solid'),
+                    (xs[source], ys[source] + header_height),
+                    (xs[target], ys[target] + header_height),
+                    arrow_style or 'solid',
                     font_small,
-                    rel.get('type', '')
+                    rel_type
                 )
         
         # Draw components
-        for comp in components:
-            if comp['name'] in adjusted_positions:
+        for node in graph.nodes():
+            if placed[node.id]:
                 self._draw_component(
                     draw,
-                    adjusted_positions[comp['name']],
-                    comp['name'],
-                    comp['shape'],
-                    comp['color'],
+                    (node.x, node.y + header_height),
+                    node.name,
+                    node.shape,
+                    node.color,
                     font
                 )
         
-        # Save image
-        filename = 'architecture.png'
-        filepath = os.path.join(output_dir, filename)
-        img.save(filepath, 'PNG')
+        # Save image under a content-hashed name (atomic write)
+        buffer = BytesIO()
+        img.save(buffer, 'PNG')
         
-        return filepath
+        return ArtifactStore(output_dir).save(buffer.getvalue(), 'architecture', 'png')
     
     def _draw_component(self, draw, position, name, shape, color, font):
         """
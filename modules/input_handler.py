@@ -3,7 +3,7 @@ class InputHandler:
     
     VALID_TOPICS = ["uber", "amazon", "dns", "netflix", "whatsapp", "instagram", "twitter", "youtube"]
     VALID_DESIGNS = ["hld", "lld"]
-    VALID_PROVIDERS = ["huggingface", "cohere", "gemini"]
+    VALID_PROVIDERS = ["huggingface", "cohere", "gemini", "ensemble"]
     
     def validate_and_parse(self, data):
         """
@@ -0,0 +1,210 @@
+import copy
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from modules import tracing
+
+class JobManager:
+    """Background job runner for the generation pipeline and batches (submit + poll/stream)"""
+
+    FINISHED_STATUSES = ('completed', 'failed')
+
+    # Stages whose output is kept in the event log for streaming clients
+    STREAMED_STAGES = {'articles', 'extract', 'normalize', 'layout', 'image', 'gif'}
+
+    def __init__(self, pipeline, max_workers=4, retention=3600):
+        """
+        pipeline: VisualizationPipeline used to run jobs
+        retention: seconds finished jobs stay queryable
+        """
+        self.pipeline = pipeline
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pipeline-job')
+        self._jobs = {}
+        # Condition doubles as the jobs lock and the "new event" signal
+        self._lock = threading.Condition()
+
+    def submit(self, config):
+        """
+        Queue a pipeline run for a validated config
+        Returns the new job id immediately
+        """
+        stages = [
+            {'step': step, 'name': name, 'status': 'pending'}
+            for step, name in sorted(self.pipeline.STAGE_NAMES.items())
+        ]
+        # Step 1 (input validation) already ran before submission
+        stages[0]['status'] = 'done'
+
+        job_id = self._create('generate', config, stages, current_step=1)
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def submit_batch(self, runner, requests_data):
+        """
+        Queue a BatchRunner run over a list of /api/generate bodies
+        Returns the new job id immediately; the job's result is the manifest
+        """
+        job_id = self._create('batch', requests_data, [], current_step=0)
+        self._executor.submit(self._run_batch, job_id, runner)
+        return job_id
+
+    def _create(self, kind, config, stages, current_step):
+        """Register a queued job and return its id"""
+        self._prune()
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            'job_id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'config': config,
+            'created_at': now,
+            'updated_at': now,
+            'current_step': current_step,
+            'total_steps': len(stages),
+            'stages': stages,
+            'result': None,
+            'error': None,
+            'timings': [],
+            'events': []
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+        return job_id
+
+    def get(self, job_id):
+        """Return a snapshot of a job (without its event log), or None if unknown/expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            return copy.deepcopy({k: v for k, v in job.items() if k != 'events'})
+
+    def iter_events(self, job_id, heartbeat=15):
+        """
+        Yield a job's events from the beginning until it finishes
+        Events: {'event': 'stage', 'step', 'name', 'status', 'output'},
+        then {'event': 'complete', 'result'} or {'event': 'error', 'error'}.
+        Yields None every `heartbeat` seconds without news (for keep-alives).
+        """
+        index = 0
+        while True:
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if not job:
+                    return
+
+                if index >= len(job['events']) and job['status'] not in self.FINISHED_STATUSES:
+                    self._lock.wait(timeout=heartbeat)
+
+                pending = job['events'][index:]
+                finished = job['status'] in self.FINISHED_STATUSES
+
+            index += len(pending)
+            if not pending and not finished:
+                yield None
+
+            for event in pending:
+                yield event
+
+            if finished:
+                return
+
+    def _run(self, job_id):
+        """Run the pipeline for a job on a worker thread"""
+        with self._lock:
+            job = self._jobs[job_id]
+            config = job['config']
+            self._update(job, status='running')
+
+        trace = tracing.Trace()
+        try:
+            result = self.pipeline.run(
+                config,
+                progress=lambda *args: self._on_progress(job_id, *args),
+                trace=trace
+            )
+        except Exception as e:
+            traceback.print_exc()
+            with self._lock:
+                job = self._jobs[job_id]
+                job['events'].append({'event': 'error', 'error': str(e)})
+                self._update(job, status='failed', error=str(e), timings=trace.to_dict())
+            return
+
+        with self._lock:
+            job = self._jobs[job_id]
+            # Cached results skip the pipeline; GIF is skipped when not requested
+            for stage in job['stages']:
+                if stage['status'] == 'pending':
+                    stage['status'] = 'cached' if result['cached'] else 'skipped'
+            job['events'].append({'event': 'complete', 'result': result})
+            self._update(
+                job,
+                status='completed',
+                result=result,
+                current_step=job['total_steps'],
+                timings=trace.to_dict()
+            )
+
+    def _run_batch(self, job_id, runner):
+        """Run a batch job on a worker thread"""
+        with self._lock:
+            job = self._jobs[job_id]
+            requests_data = job['config']
+            self._update(job, status='running')
+
+        try:
+            manifest = runner.run(requests_data)
+        except Exception as e:
+            traceback.print_exc()
+            with self._lock:
+                job = self._jobs[job_id]
+                job['events'].append({'event': 'error', 'error': str(e)})
+                self._update(job, status='failed', error=str(e))
+            return
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job['events'].append({'event': 'complete', 'result': manifest})
+            self._update(job, status='completed', result=manifest)
+
+    def _on_progress(self, job_id, event, step, name, output):
+        """Record per-stage progress reported by the pipeline"""
+        statuses = {'start': 'running', 'done': 'done', 'skip': 'skipped'}
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            job['stages'][step - 1]['status'] = statuses[event]
+            job['events'].append({
+                'event': 'stage',
+                'step': step,
+                'name': name,
+                'status': statuses[event],
+                'output': output if name in self.STREAMED_STAGES else None
+            })
+            self._update(job, current_step=step)
+
+    def _update(self, job, **fields):
+        """Apply field updates, bump updated_at and wake streamers (caller holds the lock)"""
+        job.update(fields)
+        job['updated_at'] = time.time()
+        self._lock.notify_all()
+
+    def _prune(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job['status'] in self.FINISHED_STATUSES and job['updated_at'] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
@@ -0,0 +1,96 @@
+import re
+
+class KeywordMatcher:
+    """
+    Precompiled multi-keyword matcher
+
+    All keywords are compiled into one regex shaped like a trie
+    (e.g. 'ca(?:che|ssandra)'), so a text is scanned once instead of once
+    per keyword. At each position the longest keyword wins; keywords that
+    are substrings of a match are reported through `implied`, so
+    `matches()` gives exactly the keywords that `kw in text` would find.
+    """
+
+    def __init__(self, keywords, ignore_case=False):
+        self.keywords = list(dict.fromkeys(keywords))
+        flags = re.IGNORECASE if ignore_case else 0
+
+        # '(?!)' never matches, for an empty keyword list
+        body = self._trie_pattern(self._build_trie(self.keywords)) or '(?!)'
+        self._pattern = re.compile(body, flags)
+        self._canonical = {kw.lower(): kw for kw in self.keywords} if ignore_case else None
+
+        # Keywords contained in each keyword (found whenever the longer one is)
+        self.implied = {
+            kw: {other for other in self.keywords if other != kw and self._contains(kw, other, ignore_case)}
+            for kw in self.keywords
+        }
+
+    def search(self, text):
+        """True if any keyword occurs in text"""
+        return self._pattern.search(text) is not None
+
+    def finditer(self, text):
+        """
+        Yield (start, end, keyword) for the longest keyword starting at each
+        position where one starts (overlapping matches included)
+        Pipeline callers only need presence (search/matches) or replacement
+        (sub); AIExtractor's patterns capture groups and run as their own
+        compiled regexes, so they do not consume these positions
+        """
+        search = self._pattern.search
+        match = search(text)
+        while match:
+            yield match.start(), match.end(), self._keyword(match.group())
+            # Restart one character later so overlapping keywords are found too
+            match = search(text, match.start() + 1)
+
+    def matches(self, text):
+        """Set of keywords occurring anywhere in text"""
+        found = set()
+        for _, _, keyword in self.finditer(text):
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self.implied[keyword])
+                if len(found) == len(self.keywords):
+                    break
+        return found
+
+    def sub(self, repl, text):
+        """Replace non-overlapping keyword occurrences (leftmost, longest first)"""
+        return self._pattern.sub(repl, text)
+
+    def _keyword(self, matched):
+        """Map matched text back to the keyword as given"""
+        if self._canonical is None:
+            return matched
+        return self._canonical.get(matched.lower(), matched)
+
+    def _contains(self, keyword, other, ignore_case):
+        if ignore_case:
+            return other.lower() in keyword.lower()
+        return other in keyword
+
+    def _build_trie(self, keywords):
+        """Nested dicts of characters; '' marks the end of a keyword"""
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        return trie
+
+    def _trie_pattern(self, node):
+        """Regex for a trie node, trying longer continuations before ending"""
+        branches = []
+        for char in sorted(c for c in node if c):
+            branches.append(re.escape(char) + self._trie_pattern(node[char]))
+        if '' in node:
+            branches.append('')
+
+        if not branches or branches == ['']:
+            return ''
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
@@ -1,4 +1,5 @@
 import networkx as nx
+from modules.architecture_graph import ArchitectureGraph
 
 class LayoutEngine:
     """Step 8: Layout Engine - Position components on canvas"""
@@ -14,44 +15,57 @@ class LayoutEngine:
         """
         Calculate positions for all components using layered layout
         """
-        components = visual_data['components']
-        relationships = visual_data['relationships']
+        graph = ArchitectureGraph.from_dict(visual_data)
+        positions = self._layout(graph)
         
+        return {
+            'components': visual_data['components'],
+            'relationships': visual_data['relationships'],
+            'positions': {graph.names[node_id]: position for node_id, position in positions.items()},
+            'canvas_width': self.canvas_width,
+            'canvas_height': self.canvas_height
+        }
+    
+    def layout_graph(self, graph):
+        """
+        calculate_layout() for an ArchitectureGraph: sets node positions and
+        the canvas size in place (walking node ids) and returns the graph
+        """
+        graph = ArchitectureGraph.coerce(graph)
+        for node_id, (x, y) in self._layout(graph).items():
+            graph.set_position(node_id, x, y)
+        graph.canvas_width = self.canvas_width
+        graph.canvas_height = self.canvas_height
+        return graph
+    
+    def _layout(self, graph):
+        """Node id -> (x, y) for a graph's components, in layer order"""
         # Build dependency graph
-        graph = self._build_graph(components, relationships)
+        dependencies = self._build_graph(graph)
         
         # Calculate layers (topological sort)
-        layers = self._calculate_layers(graph, relationships)
+        layers = self._calculate_layers(dependencies)
         
         # Assign positions
-        positions = self._assign_positions(layers, components)
-        
-        return {
-            'components': components,
-            'relationships': relationships,
-            'positions': positions,
-            'canvas_width': self.canvas_width,
-            'canvas_height': self.canvas_height
-        }
+        return self._assign_positions(layers)
     
-    def _build_graph(self, components, relationships):
+    def _build_graph(self, graph):
         """
-        Build directed graph from relationships
+        Build directed graph (of node ids) from relationships
         """
-        graph = nx.DiGraph()
+        dependencies = nx.DiGraph()
         
         # Add all components as nodes
-        for comp in components:
-            graph.add_node(comp['name'])
+        dependencies.add_nodes_from(node_id for node_id in range(len(graph)) if graph.is_component[node_id])
         
         # Add edges
-        for rel in relationships:
-            if rel['from'] in graph and rel['to'] in graph:
-                graph.add_edge(rel['from'], rel['to'])
+        for source, target, _, _ in graph.edges():
+            if source in dependencies and target in dependencies:
+                dependencies.add_edge(source, target)
         
-        return graph
+        return dependencies
     
-    def _calculate_layers(self, graph, relationships):
+    def _calculate_layers(self, graph):
         """
         Assign components to layers using topological sort
         """
@@ -69,7 +83,7 @@ class LayoutEngine:
                 else:
                     layers[node] = max(layers.get(pred, 0) for pred in predecessors) + 1
             
-        except nx.NetworkXError:
+        except (nx.NetworkXError, nx.NetworkXUnfeasible):
             # Graph has cycles, use simple heuristic
             layers = self._simple_layering(graph)
         
@@ -120,7 +134,7 @@ class LayoutEngine:
         
         return layers
     
-    def _assign_positions(self, layer_groups, components):
+    def _assign_positions(self, layer_groups):
         """
         Assign x, y coordinates to components
         """
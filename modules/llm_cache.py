@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import re
+from modules.result_cache import ResultCache
+
+class LLMCache:
+    """
+    Persistent cache of raw LLM responses keyed on (provider, model, prompt)
+
+    Besides the exact prompt hash, responses are indexed under a normalized
+    fingerprint of the prompt (case, punctuation, whitespace and sentence
+    order ignored), so re-ordered or re-spaced input still hits.
+    Modes: 'readwrite' (default), 'replay' (serve recorded responses only,
+    never call a provider; for offline tests) and 'off'.
+    """
+
+    MODES = ('readwrite', 'replay', 'off')
+
+    SENTENCE_BOUNDARY = re.compile(r'[.!?\n]+')
+    NON_WORD = re.compile(r'[^\w\s]+')
+    WHITESPACE = re.compile(r'\s+')
+
+    def __init__(self, cache_dir=os.path.join('cache', 'llm'), max_entries=2048, ttl=604800,
+                 mode='readwrite', fingerprint=True):
+        """
+        ttl: seconds a response stays valid (0 = never expires)
+        fingerprint: also match prompts that only differ after normalization
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid LLM cache mode: {mode}. Choose from {self.MODES}")
+
+        self.mode = mode
+        self.use_fingerprint = fingerprint
+        self._cache = ResultCache(cache_dir=cache_dir, max_entries=max_entries, ttl=ttl)
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    @property
+    def replay(self):
+        """True when providers must not be called (responses come from the cache only)"""
+        return self.mode == 'replay'
+
+    def get(self, provider, model, prompt):
+        """Recorded response text for a prompt, or None on miss"""
+        if not self.enabled:
+            return None
+
+        for key in self._keys(provider, model, prompt):
+            entry = self._cache.get(key)
+            if entry is not None:
+                return entry['value']['response']
+        return None
+
+    def put(self, provider, model, prompt, response):
+        """Record a provider's raw response text"""
+        if self.mode != 'readwrite':
+            return
+
+        value = {'provider': provider, 'model': model, 'response': response}
+        for key in self._keys(provider, model, prompt):
+            self._cache.put(key, value)
+
+    def clear(self):
+        self._cache.clear()
+
+    def make_key(self, provider, model, prompt):
+        """Exact key: hash of provider, model and the full prompt"""
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        return self._hash(['prompt', provider, model, prompt_hash])
+
+    def fingerprint(self, provider, model, prompt):
+        """Normalized key: sorted set of normalized sentences in the prompt"""
+        sentences = set()
+        for sentence in self.SENTENCE_BOUNDARY.split(prompt.lower()):
+            sentence = self.WHITESPACE.sub(' ', self.NON_WORD.sub(' ', sentence)).strip()
+            if sentence:
+                sentences.add(sentence)
+        return self._hash(['fingerprint', provider, model, sorted(sentences)])
+
+    def _keys(self, provider, model, prompt):
+        keys = [self.make_key(provider, model, prompt)]
+        if self.use_fingerprint:
+            keys.append(self.fingerprint(provider, model, prompt))
+        return keys
+
+    def _hash(self, payload):
+        data = json.dumps(payload, separators=(',', ':'))
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
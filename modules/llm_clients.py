@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Provider SDKs are optional: imported once per process, at module load
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+try:
+    import cohere
+except ImportError:
+    cohere = None
+
+class LLMClientRegistry:
+    """
+    Process-wide LLM clients, built once and shared across threads
+
+    Clients are created lazily (or by warm_up at startup) under a lock and
+    rebuilt only if the provider's API key changes, so requests reuse the
+    SDK's connections instead of constructing a client per call. Each
+    provider also keeps health state from the calls made through it.
+    """
+
+    API_KEY_ENV = {
+        'gemini': 'GEMINI_API_KEY',
+        'cohere': 'COHERE_API_KEY'
+    }
+
+    MODELS = {
+        'gemini': 'gemini-pro',
+        'cohere': 'command'
+    }
+
+    # Latency samples kept per provider for the hedge delay
+    LATENCY_WINDOW = 100
+    MIN_LATENCY_SAMPLES = 5
+
+    def __init__(self, failure_threshold=3, cooldown=60):
+        """
+        failure_threshold: consecutive failures that open a provider's circuit
+        cooldown: seconds an open circuit rejects calls before one trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._latencies = {provider: deque(maxlen=self.LATENCY_WINDOW) for provider in self.API_KEY_ENV}
+        self._probing = set()
+        self._health = {
+            provider: {
+                'consecutive_failures': 0,
+                'last_error': None,
+                'last_success_at': None,
+                'last_failure_at': None,
+                'last_latency_ms': None
+            }
+            for provider in self.API_KEY_ENV
+        }
+
+    def get(self, provider):
+        """
+        Shared client for a provider (Gemini: GenerativeModel, Cohere: Client)
+        Raises RuntimeError if the SDK is missing or no API key is set
+        """
+        api_key = os.getenv(self.API_KEY_ENV[provider])
+        if not self._sdk(provider):
+            raise RuntimeError(f"{provider} SDK is not installed")
+        if not api_key:
+            raise RuntimeError(f"{self.API_KEY_ENV[provider]} not set")
+
+        with self._lock:
+            cached = self._clients.get(provider)
+            if cached and cached[0] == api_key:
+                return cached[1]
+
+            client = self._build(provider, api_key)
+            self._clients[provider] = (api_key, client)
+            return client
+
+    def warm_up(self, providers=None):
+        """
+        Build clients for every configured provider ahead of the first request
+        Returns the health report
+        """
+        for provider in providers or self.API_KEY_ENV:
+            if self._sdk(provider) and os.getenv(self.API_KEY_ENV[provider]):
+                try:
+                    self.get(provider)
+                except Exception as e:
+                    print(f"Warm-up failed for {provider}: {e}")
+                    self.record_failure(provider, e)
+        return self.health()
+
+    def is_available(self, provider):
+        """SDK installed, API key set and circuit not open"""
+        return bool(self._sdk(provider) and os.getenv(self.API_KEY_ENV[provider])) and \
+            self._circuit_state(provider) != 'open'
+
+    def allow_request(self, provider):
+        """
+        Circuit breaker check before calling a provider
+        Closed: allowed. Open: rejected until the cooldown has passed, then a
+        single trial call is let through (half-open); its outcome closes or
+        re-opens the circuit.
+        """
+        with self._lock:
+            state = self._circuit_state_locked(provider)
+            if state == 'closed':
+                return True
+            if state == 'half_open' and provider not in self._probing:
+                self._probing.add(provider)
+                return True
+            return False
+
+    def hedge_delay(self, provider, default=10.0, minimum=0.5):
+        """
+        Seconds to wait for a provider before hedging: its p95 latency over
+        recent successful calls, or `default` until enough samples exist
+        """
+        with self._lock:
+            samples = sorted(self._latencies[provider])
+        if len(samples) < self.MIN_LATENCY_SAMPLES:
+            return default
+        p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+        return max(minimum, p95)
+
+    def record_success(self, provider, latency):
+        """Record a successful call (latency in seconds); closes the circuit"""
+        with self._lock:
+            health = self._health[provider]
+            health['consecutive_failures'] = 0
+            health['last_success_at'] = time.time()
+            health['last_latency_ms'] = round(latency * 1000, 1)
+            self._latencies[provider].append(latency)
+            self._probing.discard(provider)
+
+    def record_failure(self, provider, error):
+        """Record a failed call; enough of them in a row open the circuit"""
+        with self._lock:
+            health = self._health[provider]
+            health['consecutive_failures'] += 1
+            health['last_error'] = str(error)
+            health['last_failure_at'] = time.time()
+            self._probing.discard(provider)
+
+    def health(self):
+        """
+        Per-provider status (not_installed, not_configured, cold, ready,
+        degraded or down) with circuit state and p95 latency
+        """
+        report = {}
+        with self._lock:
+            for provider, health in self._health.items():
+                circuit = self._circuit_state_locked(provider)
+                if not self._sdk(provider):
+                    status = 'not_installed'
+                elif not os.getenv(self.API_KEY_ENV[provider]):
+                    status = 'not_configured'
+                elif circuit != 'closed':
+                    status = 'down'
+                elif health['consecutive_failures']:
+                    status = 'degraded'
+                elif provider in self._clients:
+                    status = 'ready'
+                else:
+                    status = 'cold'
+
+                samples = sorted(self._latencies[provider])
+                p95 = samples[int(round(0.95 * (len(samples) - 1)))] if samples else None
+                report[provider] = dict(
+                    health,
+                    status=status,
+                    circuit=circuit,
+                    p95_latency_ms=round(p95 * 1000, 1) if p95 is not None else None
+                )
+        return report
+
+    def _circuit_state(self, provider):
+        with self._lock:
+            return self._circuit_state_locked(provider)
+
+    def _circuit_state_locked(self, provider):
+        """closed, open or half_open (caller holds the lock)"""
+        health = self._health[provider]
+        if health['consecutive_failures'] < self.failure_threshold:
+            return 'closed'
+        if time.time() - health['last_failure_at'] >= self.cooldown:
+            return 'half_open'
+        return 'open'
+
+    def _sdk(self, provider):
+        return genai if provider == 'gemini' else cohere
+
+    def _build(self, provider, api_key):
+        """Construct a provider client (caller holds the lock)"""
+        if provider == 'gemini':
+            # genai.configure sets process-global credentials
+            genai.configure(api_key=api_key)
+            return genai.GenerativeModel(self.MODELS['gemini'])
+        return cohere.Client(api_key)
+
+# Shared by every AIExtractor in the process
+registry = LLMClientRegistry(
+    failure_threshold=int(os.getenv('LLM_CIRCUIT_FAILURES', '3')),
+    cooldown=int(os.getenv('LLM_CIRCUIT_COOLDOWN', '60'))
+)
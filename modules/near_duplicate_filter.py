@@ -0,0 +1,137 @@
+import re
+import zlib
+from collections import deque
+import numpy as np
+
+class NearDuplicateFilter:
+    """
+    MinHash LSH near-duplicate detection for sentences
+
+    Each sentence becomes a set of word shingles (punctuation and case are
+    ignored). MinHash signatures are banded into LSH buckets, so only
+    sentences sharing a bucket are compared; candidates are then verified
+    with exact Jaccard similarity. The first sentence of a near-duplicate
+    group is kept. Work is roughly linear in the number of sentences.
+
+    Only the last `window` kept sentences are remembered (oldest evicted
+    first), so memory stays bounded however long the input is; a sentence
+    is only compared against that window.
+    """
+
+    TOKEN_PATTERN = re.compile(r'\w+')
+    PRIME = (1 << 31) - 1
+
+    def __init__(self, threshold=0.7, num_perm=64, shingle_size=2, seed=1, window=4096):
+        """
+        threshold: Jaccard similarity (0-1] at or above which a sentence is a near-duplicate
+        num_perm: MinHash permutations (more = fewer missed candidates, slower)
+        shingle_size: words per shingle
+        window: kept sentences remembered for comparison (0 = unbounded)
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.window = window
+        self.bands, self.rows = self._choose_bands(threshold, num_perm)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, self.PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, self.PRIME, size=num_perm).astype(np.uint64)
+        self.reset()
+
+    def reset(self):
+        """Forget every sentence seen so far"""
+        # One {band hash: [entry ids, oldest first]} dict per band
+        self._buckets = [{} for _ in range(self.bands)]
+        self._shingles = {}
+        self._order = deque()
+        self._next_id = 0
+
+    def add(self, sentence):
+        """
+        Register a sentence; returns False if it near-duplicates one already
+        added (it is then not added), True otherwise
+        """
+        shingles = self._shingle_hashes(sentence)
+        if len(shingles) == 0:
+            return True
+
+        signature = self._signature(shingles).tobytes()
+        width = self.rows * 8
+        # Bands are keyed by the hash of their bytes; a collision only adds
+        # a candidate, which the exact Jaccard check then rejects
+        band_keys = [hash(signature[band * width:(band + 1) * width]) for band in range(self.bands)]
+
+        checked = set()
+        for buckets, key in zip(self._buckets, band_keys):
+            for candidate in buckets.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if self._jaccard(shingles, self._shingles[candidate]) >= self.threshold:
+                    return False
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._shingles[entry_id] = shingles
+        self._order.append((entry_id, tuple(band_keys)))
+        for buckets, key in zip(self._buckets, band_keys):
+            buckets.setdefault(key, []).append(entry_id)
+
+        if self.window and len(self._order) > self.window:
+            self._evict()
+        return True
+
+    def filter(self, sentences):
+        """Sentences with near-duplicates of earlier ones removed (order kept)"""
+        self.reset()
+        return [sentence for sentence in sentences if self.add(sentence)]
+
+    def _evict(self):
+        """Forget the oldest remembered sentence"""
+        entry_id, band_keys = self._order.popleft()
+        del self._shingles[entry_id]
+        for buckets, key in zip(self._buckets, band_keys):
+            bucket = buckets[key]
+            # Ids are appended in order, so remove() finds the oldest at the front
+            bucket.remove(entry_id)
+            if not bucket:
+                del buckets[key]
+
+    def _shingle_hashes(self, sentence):
+        """Set of CRC32 hashes of the sentence's word shingles"""
+        tokens = self.TOKEN_PATTERN.findall(sentence.lower())
+        size = min(self.shingle_size, len(tokens))
+        if size == 0:
+            return frozenset()
+
+        return frozenset(
+            zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+            for i in range(len(tokens) - size + 1)
+        )
+
+    def _signature(self, shingles):
+        """MinHash signature: min over shingles of (a * x + b) mod p per permutation"""
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        hashed = (np.outer(values, self._a) + self._b) % self.PRIME
+        return hashed.min(axis=0)
+
+    def _jaccard(self, first, second):
+        """Exact Jaccard similarity of two shingle hash sets"""
+        common = len(first & second)
+        return common / (len(first) + len(second) - common)
+
+    def _choose_bands(self, threshold, num_perm):
+        """
+        Pick (bands, rows) with bands * rows == num_perm whose LSH threshold
+        (1/b)^(1/r) sits at or below `threshold`, with as many rows as possible
+        (fewer candidates to verify without missing true near-duplicates)
+        """
+        best = (num_perm, 1)
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            if (1 / bands) ** (1 / rows) <= threshold:
+                best = (bands, rows)
+        return best
@@ -0,0 +1,360 @@
+import atexit
+import hashlib
+import os
+from modules.article_finder import ArticleFinder
+from modules.web_scraper import WebScraper
+from modules.text_cleaner import TextCleaner
+from modules.ai_extractor import AIExtractor
+from modules.prompt_packer import PromptPacker
+from modules.data_normalizer import DataNormalizer
+from modules.visual_mapper import VisualMapper
+from modules.layout_engine import LayoutEngine
+from modules.image_generator import ImageGenerator
+from modules.gif_generator import GIFGenerator
+from modules.architecture_graph import ArchitectureGraph
+from modules.result_cache import ResultCache
+from modules.alias_table import AliasTable
+from modules.stage_cache import StageCache
+from modules.http_cache import HTTPCache
+from modules.llm_cache import LLMCache
+from modules.artifact_store import ArtifactStore
+from modules import tracing
+
+class VisualizationPipeline:
+    """Runs steps 2-10 for a validated config (with optional caching)"""
+
+    # Numbered steps reported to progress callbacks (step 1 is InputHandler)
+    STAGE_NAMES = {
+        1: 'input',
+        2: 'articles',
+        3: 'scrape',
+        4: 'clean',
+        5: 'extract',
+        6: 'normalize',
+        7: 'map',
+        8: 'layout',
+        9: 'image',
+        10: 'gif'
+    }
+
+    def __init__(self, output_dir, result_cache=None, stage_cache=None, http_cache=None, artifact_store=None,
+                 llm_cache=None, alias_table=None):
+        self.output_dir = output_dir
+        self.alias_table = alias_table
+        self.artifact_store = artifact_store
+        self.http_cache = http_cache
+        self.llm_cache = llm_cache
+        self.result_cache = result_cache
+        self.stage_cache = stage_cache
+        self._fingerprint = None
+
+    @classmethod
+    def from_env(cls, output_dir):
+        """
+        Build a pipeline with result/stage/HTTP caches and artifact retention
+        configured from environment variables (see .env.template)
+        """
+        result_cache = ResultCache(
+            cache_dir=os.getenv('RESULT_CACHE_DIR', os.path.join('cache', 'results')),
+            max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '256')),
+            ttl=int(os.getenv('RESULT_CACHE_TTL', '3600'))
+        )
+
+        # Per-stage memoization (scrape, clean, extract, normalize, layout)
+        stage_cache = StageCache(
+            cache_dir=os.getenv('STAGE_CACHE_DIR', os.path.join('cache', 'stages')),
+            max_entries=int(os.getenv('STAGE_CACHE_MAX_ENTRIES', '1024')),
+            ttl=int(os.getenv('STAGE_CACHE_TTL', '0')),
+            stage_ttls={'scrape': int(os.getenv('SCRAPE_CACHE_TTL', '86400'))}
+        )
+
+        # Conditional-GET cache for scraped article pages
+        http_cache = HTTPCache(
+            cache_dir=os.getenv('HTTP_CACHE_DIR', os.path.join('cache', 'http')),
+            max_age=int(os.getenv('HTTP_CACHE_MAX_AGE', '3600')),
+            stale_if_error=int(os.getenv('HTTP_CACHE_STALE_IF_ERROR', '86400')),
+            max_entries=int(os.getenv('HTTP_CACHE_MAX_ENTRIES', '512'))
+        )
+
+        # Raw LLM responses (exact prompt + normalized fingerprint keys)
+        llm_cache = LLMCache(
+            cache_dir=os.getenv('LLM_CACHE_DIR', os.path.join('cache', 'llm')),
+            max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '2048')),
+            ttl=int(os.getenv('LLM_CACHE_TTL', '604800')),
+            mode=os.getenv('LLM_CACHE_MODE', 'readwrite'),
+            fingerprint=os.getenv('LLM_CACHE_FINGERPRINT', 'true').lower() in ('1', 'true', 'yes')
+        )
+
+        # Raw -> canonical component names, shared by every run and worker
+        # (namespaced by the normalizer's fingerprint: rule changes start cold)
+        alias_table = AliasTable(
+            path=os.getenv('ALIAS_TABLE_PATH', os.path.join('cache', 'aliases.json')),
+            max_entries=int(os.getenv('ALIAS_TABLE_MAX_ENTRIES', '4096')),
+            namespace=stage_cache.fingerprint(DataNormalizer()),
+            save_interval=int(os.getenv('ALIAS_TABLE_SAVE_INTERVAL', '60'))
+        )
+        # Write aliases learned since the last interval save on shutdown
+        atexit.register(alias_table.save, force=True)
+
+        # Retention policy for generated PNG/GIF artifacts
+        artifact_store = ArtifactStore(
+            output_dir,
+            retention=int(os.getenv('ARTIFACT_RETENTION', '86400')),
+            max_files=int(os.getenv('ARTIFACT_MAX_FILES', '1000'))
+        )
+
+        return cls(
+            output_dir,
+            result_cache=result_cache,
+            stage_cache=stage_cache,
+            http_cache=http_cache,
+            artifact_store=artifact_store,
+            llm_cache=llm_cache,
+            alias_table=alias_table
+        )
+
+    def run(self, config, progress=None, trace=None):
+        """
+        Generate the diagram for a config from InputHandler.validate_and_parse
+        progress: optional callback(event, step, stage_name, output) with
+        event 'start', 'done' or 'skip' for each numbered step
+        trace: optional tracing.Trace collecting per-stage spans (a fresh one
+        is used otherwise, so stage metrics are always recorded)
+        Returns dict with components, relationships, image_path, gif_path, cached
+        """
+        with tracing.use_trace(trace or tracing.Trace()):
+            # Expire old artifacts from the output directory (throttled)
+            if self.artifact_store:
+                self.artifact_store.collect_garbage()
+
+            # Serve a recent identical request straight from the result cache
+            with tracing.span('result_cache'):
+                cached = self.load_cached_result(config)
+                tracing.annotate(cache='hit' if cached else 'miss')
+            if cached:
+                return cached
+
+            analysis = self.analyze(config, progress)
+            image_path, gif_path = self.render(config, analysis['positioned_data'], progress)
+
+            return self.store_result(config, analysis, image_path, gif_path)
+
+    def analyze(self, config, progress=None):
+        """
+        Steps 2-8: find, scrape, clean, extract, normalize, map and lay out
+        Returns dict with normalized_data, positioned_data and degraded
+        (True if a page was replaced by the scraper's fallback content, or an
+        LLM provider failed and the rule-based fallback was used)
+        """
+        # Step 2: Article Finder
+        urls = self._step(progress, 2, self.find_articles, config)
+
+        # Step 3: Web Scraper
+        scraper = WebScraper(http_cache=self.http_cache)
+        raw_text = self._step(progress, 3, self._run_stage, 'scrape', scraper, scraper.scrape_urls, urls)
+
+        # Step 4: Text Cleaner
+        cleaner = TextCleaner()
+        clean_text = self._step(progress, 4, self._run_stage, 'clean', cleaner, cleaner.clean, raw_text)
+
+        # Step 5: AI Extractor
+        # (API key, prompt budget and LLM cache mode all change what the
+        # extractor returns, so they are part of the stage input)
+        extractor = AIExtractor(llm_cache=self.llm_cache)
+        architecture_data = self._step(
+            progress,
+            5,
+            self._run_stage,
+            'extract',
+            extractor,
+            lambda text, provider, _settings: extractor.extract(text, provider),
+            clean_text,
+            config['ai_provider'],
+            self._extract_settings(extractor, config['ai_provider'])
+        )
+        
+        # Step 6: Data Normalizer
+        normalizer = DataNormalizer(alias_table=self.alias_table)
+        normalized_data = self._step(
+            progress, 6, self._run_stage, 'normalize', normalizer, normalizer.normalize, architecture_data
+        )
+        if self.alias_table:
+            # Persist newly learned aliases (at most once per save interval)
+            self.alias_table.save()
+
+        # Step 7: Visual Mapper (builds the compact graph layout and rendering walk)
+        mapper = VisualMapper()
+        visual_graph = self._step(progress, 7, mapper.map_graph, normalized_data)
+
+        # Step 8: Layout Engine (a stage-cache hit comes back as a dict)
+        layout = LayoutEngine()
+        positioned_data = ArchitectureGraph.coerce(self._step(
+            progress, 8, self._run_stage, 'layout', layout, layout.layout_graph, visual_graph
+        ))
+
+        return {
+            'normalized_data': normalized_data,
+            'positioned_data': positioned_data,
+            'degraded': scraper.degraded or extractor.degraded
+        }
+
+    def render(self, config, positioned_data, progress=None):
+        """
+        Steps 9-10: draw the PNG and, if requested, the animated GIF
+        Returns (image_path, gif_path)
+        """
+        # Both renderers walk the same compact graph
+        graph = ArchitectureGraph.coerce(positioned_data)
+
+        # Step 9: Image Generator
+        image_gen = ImageGenerator()
+        metadata = {'topic': config['topic'], 'design': config['design']}
+        image_path = self._step(progress, 9, image_gen.generate, graph, self.output_dir, metadata)
+
+        # Step 10: GIF Generator (optional)
+        gif_path = None
+        if config.get('generate_gif', False):
+            gif_gen = GIFGenerator()
+            gif_path = self._step(progress, 10, gif_gen.generate, graph, self.output_dir)
+        elif progress:
+            progress('skip', 10, self.STAGE_NAMES[10], None)
+
+        return image_path, gif_path
+
+    def find_articles(self, config):
+        """Step 2 on its own: article URLs for a config"""
+        article_finder = ArticleFinder()
+        return article_finder.find_articles(config['topic'], config['design'])
+
+    def scrape(self, urls):
+        """Step 3 on its own: scraped raw text for a list of URLs (stage-cached)"""
+        scraper = WebScraper(http_cache=self.http_cache)
+        return self._run_stage('scrape', scraper, scraper.scrape_urls, urls)
+
+    def result_key(self, config):
+        """Whole-response cache key for a config, or None without a result cache"""
+        if not self.result_cache:
+            return None
+        # Provider settings decide LLM vs rule-based output (as in the extract stage key)
+        extractor = AIExtractor(llm_cache=self.llm_cache)
+        return self.result_cache.make_key({
+            'config': config,
+            'pipeline': self.fingerprint(),
+            'extract': self._extract_settings(extractor, config['ai_provider'])
+        })
+
+    def load_cached_result(self, config):
+        """Restore a cached result and its artifacts, or None on miss"""
+        if not self.result_cache:
+            return None
+
+        cached = self.result_cache.get(self.result_key(config))
+        if not cached:
+            return None
+
+        image_path = self.result_cache.restore_artifact(cached, 'image', self.output_dir)
+        gif_path = self.result_cache.restore_artifact(cached, 'gif', self.output_dir)
+        if not image_path or (config.get('generate_gif', False) and not gif_path):
+            return None
+
+        return dict(cached['value'], image_path=image_path, gif_path=gif_path, cached=True)
+
+    def store_result(self, config, analysis, image_path, gif_path):
+        """Build the final result and record it in the result cache"""
+        normalized_data = analysis['normalized_data']
+        result = {
+            'components': normalized_data['components'],
+            'relationships': normalized_data['relationships']
+        }
+
+        # Don't pin fallback content from a failing origin or provider for the cache TTL
+        if self.result_cache and not analysis.get('degraded'):
+            self.result_cache.put(
+                self.result_key(config),
+                result,
+                artifacts={'image': image_path, 'gif': gif_path}
+            )
+
+        return dict(result, image_path=image_path, gif_path=gif_path, cached=False)
+
+    def fingerprint(self):
+        """
+        Combined fingerprint of every stage, so a deploy that changes any
+        stage (including rendering) misses the whole-response cache
+        """
+        if self._fingerprint is None:
+            fingerprinter = self.stage_cache or StageCache()
+            stages = [
+                ArticleFinder(), WebScraper(), TextCleaner(), AIExtractor(), DataNormalizer(),
+                VisualMapper(), LayoutEngine(), ImageGenerator(), GIFGenerator()
+            ]
+            combined = ':'.join(fingerprinter.fingerprint(stage) for stage in stages)
+            self._fingerprint = hashlib.sha256(combined.encode('utf-8')).hexdigest()
+        return self._fingerprint
+
+    def _step(self, progress, step, func, *args):
+        """
+        Run one numbered step, reporting start/done to the progress callback
+        and recording a timing span with the step's input/output sizes
+        """
+        name = self.STAGE_NAMES[step]
+        if progress:
+            progress('start', step, name, None)
+
+        with tracing.span(name) as measures:
+            output = func(*args)
+            measures.update(self._measure(name, args, output))
+
+        if progress:
+            progress('done', step, name, output)
+        return output
+
+    def _measure(self, name, args, output):
+        """Input/output sizes recorded on a step's span"""
+        if name == 'articles':
+            return {'urls': len(output)}
+        if name == 'scrape':
+            return {'urls': len(args[-1]), 'bytes_scraped': len(output.encode('utf-8'))}
+        if name == 'clean':
+            return {
+                'input_bytes': len(args[-1].encode('utf-8')),
+                'output_bytes': len(output.encode('utf-8')),
+                'sentences': len(output.split('. ')) if output else 0
+            }
+        if name == 'extract':
+            return {
+                'input_bytes': len(args[-3].encode('utf-8')),
+                'components': len(output['components']),
+                'edges': len(output['relationships'])
+            }
+        if name in ('map', 'layout') and isinstance(output, ArchitectureGraph):
+            return {'components': output.component_count, 'edges': output.edge_count}
+        if name in ('normalize', 'map', 'layout'):
+            return {'components': len(output['components']), 'edges': len(output['relationships'])}
+        if name in ('image', 'gif'):
+            graph = args[0]
+            return {
+                'pixels': graph.canvas_width * graph.canvas_height,
+                'bytes_written': os.path.getsize(output)
+            }
+        return {}
+
+    def _extract_settings(self, extractor, provider):
+        """Provider settings that decide LLM vs rule-based extraction output"""
+        if provider == 'ensemble':
+            return {
+                'configured': {name: extractor.is_configured(name) for name in extractor.MODELS},
+                'prompt_budget': {name: PromptPacker(name).budget for name in extractor.MODELS},
+                'llm_cache_mode': self.llm_cache.mode if self.llm_cache else None
+            }
+        return {
+            'configured': extractor.is_configured(provider),
+            'prompt_budget': PromptPacker(provider).budget,
+            'llm_cache_mode': self.llm_cache.mode if self.llm_cache else None
+        }
+
+    def _run_stage(self, stage_name, stage, func, *inputs):
+        """Run a stage through the stage cache when one is configured"""
+        if self.stage_cache:
+            return self.stage_cache.run(stage_name, stage, func, *inputs)
+        return func(*inputs)
@@ -0,0 +1,114 @@
+import math
+import os
+import re
+from functools import lru_cache
+
+class ApproxTokenizer:
+    """
+    Fast token-count approximation for subword (BPE/SentencePiece) models
+    Words cost ceil(len / chars_per_token) tokens, punctuation one each.
+    Counts are memoized, since the same cleaned sentences recur.
+    """
+
+    PIECE_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+    def __init__(self, chars_per_token=4.0):
+        self.chars_per_token = chars_per_token
+        self.count = lru_cache(maxsize=65536)(self._count)
+
+    def _count(self, text):
+        tokens = 0
+        for piece in self.PIECE_PATTERN.findall(text):
+            tokens += max(1, math.ceil(len(piece) / self.chars_per_token))
+        return tokens
+
+class PromptPacker:
+    """Packs ranked sentences into a provider's prompt token budget"""
+
+    # Prompt budgets (template + article text) in tokens, well inside each
+    # model's context after leaving room for the JSON answer.
+    # Override with <PROVIDER>_PROMPT_TOKENS, e.g. GEMINI_PROMPT_TOKENS=2000.
+    DEFAULT_BUDGETS = {
+        'gemini': 1400,
+        'cohere': 1400
+    }
+
+    # Characters per token for each provider's tokenizer family
+    CHARS_PER_TOKEN = {
+        'gemini': 4.0,
+        'cohere': 4.2
+    }
+
+    SEPARATOR = '. '
+
+    def __init__(self, provider, budget=None):
+        self.provider = provider
+        if budget is None:
+            default = self.DEFAULT_BUDGETS.get(provider, 1400)
+            budget = int(os.getenv(f'{provider.upper()}_PROMPT_TOKENS', str(default)))
+        self.budget = budget
+        self.tokenizer = self.get_tokenizer(provider)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def get_tokenizer(cls, provider):
+        """One tokenizer (and token-count cache) per provider for the process"""
+        return ApproxTokenizer(cls.CHARS_PER_TOKEN.get(provider, 4.0))
+
+    def pack(self, template, sentences):
+        """
+        Fill the budget greedily by rank: sentences are taken best first and
+        any that would overflow is skipped in favour of shorter ones below it.
+        Packed sentences keep their rank order; none is cut mid-way unless
+        even the best one alone exceeds the budget.
+        template: prompt with a {text} placeholder
+        Returns (prompt, stats)
+        """
+        count = self.tokenizer.count
+        template_tokens = count(template.format(text=''))
+        available = max(0, self.budget - template_tokens)
+        separator_tokens = count(self.SEPARATOR.strip())
+
+        packed = []
+        used = 0
+        for sentence in sentences:
+            cost = count(sentence) + (separator_tokens if packed else 0)
+            if used + cost <= available:
+                packed.append(sentence)
+                used += cost
+
+        truncated = False
+        if not packed and sentences:
+            packed = [self._truncate(sentences[0], available)]
+            used = count(packed[0])
+            truncated = True
+
+        text = self.SEPARATOR.join(packed)
+        prompt = template.format(text=text)
+        used_tokens = template_tokens + used
+
+        stats = {
+            'provider': self.provider,
+            'budget_tokens': self.budget,
+            'template_tokens': template_tokens,
+            'text_tokens': used,
+            'used_tokens': used_tokens,
+            'utilization': round(used_tokens / self.budget, 3) if self.budget else 0.0,
+            'sentences_total': len(sentences),
+            'sentences_packed': len(packed),
+            'truncated': truncated
+        }
+        return prompt, stats
+
+    def _truncate(self, sentence, available):
+        """Longest word-boundary prefix of sentence within `available` tokens"""
+        count = self.tokenizer.count
+        words = sentence.split()
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count(' '.join(words[:middle])) <= available:
+                low = middle
+            else:
+                high = middle - 1
+        return ' '.join(words[:low])
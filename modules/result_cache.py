@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """Content-addressed result cache (LRU + TTL, disk-backed)"""
+
+    def __init__(self, cache_dir=os.path.join('cache', 'results'), max_entries=256, ttl=3600):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._prune_disk()
+
+    def make_key(self, config):
+        """
+        Build a stable content key from a normalized config dict
+        """
+        payload = json.dumps(config, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached entry for key, or None on miss/expiry
+        Entry format: {'created_at', 'value', 'artifacts'}
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load_entry(key)
+                if entry is None:
+                    return None
+                self._entries[key] = entry
+
+            if self._is_expired(entry):
+                self._evict(key)
+                return None
+
+            self._entries.move_to_end(key)
+            self._enforce_limit()
+            return entry
+
+    def put(self, key, value, artifacts=None):
+        """
+        Store a JSON-serializable value plus optional artifact files
+        artifacts: dict of artifact name -> file path (copied into the cache)
+        """
+        stored_artifacts = {}
+        for name, path in (artifacts or {}).items():
+            if not path or not os.path.exists(path):
+                continue
+
+            ext = os.path.splitext(path)[1]
+            cached_path = os.path.join(self.cache_dir, f"{key}.{name}{ext}")
+            self._atomic_copy(path, cached_path)
+            stored_artifacts[name] = {
+                'path': cached_path,
+                'filename': os.path.basename(path)
+            }
+
+        entry = {
+            'created_at': time.time(),
+            'value': value,
+            'artifacts': stored_artifacts
+        }
+
+        self._write_entry(key, entry)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._enforce_limit()
+
+        return entry
+
+    def restore_artifact(self, entry, name, output_dir):
+        """
+        Copy a cached artifact back into output_dir
+        Returns the restored path, or None if the artifact is missing
+        """
+        artifact = entry.get('artifacts', {}).get(name)
+        if not artifact or not os.path.exists(artifact['path']):
+            return None
+
+        target = os.path.join(output_dir, artifact['filename'])
+        self._atomic_copy(artifact['path'], target)
+        return target
+
+    def invalidate(self, key):
+        """Drop a single entry from memory and disk"""
+        with self._lock:
+            self._evict(key)
+
+    def clear(self):
+        """Drop every entry from memory and disk"""
+        with self._lock:
+            for key in list(self._entries.keys()):
+                self._evict(key)
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    self._evict(filename[:-len('.json')])
+
+    def _is_expired(self, entry):
+        """Check entry age against the TTL (ttl <= 0 disables expiry)"""
+        if self.ttl <= 0:
+            return False
+        return time.time() - entry.get('created_at', 0) > self.ttl
+
+    def _enforce_limit(self):
+        """Evict least recently used entries beyond max_entries"""
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._evict(oldest_key)
+
+    def _evict(self, key):
+        """Remove an entry and its artifacts (caller holds the lock)"""
+        entry = self._entries.pop(key, None) or self._load_entry(key)
+
+        paths = [self._entry_path(key)]
+        if entry:
+            paths.extend(a['path'] for a in entry.get('artifacts', {}).values())
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_entry(self, key):
+        """Load an entry from disk, or None if absent/corrupt"""
+        try:
+            with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_entry(self, key, entry):
+        """Write entry JSON atomically (write temp file, then rename)"""
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def _atomic_copy(self, source, target):
+        """Copy a file so readers never observe a partial write"""
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+
+    def _prune_disk(self):
+        """
+        Drop expired entries left by previous runs and keep the newest max_entries
+        """
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.json'):
+                continue
+            key = filename[:-len('.json')]
+            entry = self._load_entry(key)
+            if entry is None or self._is_expired(entry):
+                self._evict(key)
+                continue
+            entries.append((entry.get('created_at', 0), key))
+
+        entries.sort(reverse=True)
+        for _, key in entries[self.max_entries:]:
+            self._evict(key)
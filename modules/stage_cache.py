@@ -0,0 +1,156 @@
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+from modules.result_cache import ResultCache
+from modules import tracing
+
+class StageCache:
+    """Per-stage memoization keyed on stage code + input content"""
+
+    # Modules of this package count as stage code (see fingerprint)
+    PACKAGE_PREFIX = __name__.rpartition('.')[0] + '.'
+
+    def __init__(self, cache_dir=os.path.join('cache', 'stages'), max_entries=1024, ttl=0, stage_ttls=None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stage_ttls = stage_ttls or {}
+        self._caches = {}
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def run(self, stage_name, stage, func, *inputs):
+        """
+        Return func(*inputs), memoized under a hash of the stage's code/settings and its inputs
+        Changing a stage only invalidates that stage and, through content
+        hashing of its output, whichever downstream stages see different input
+        """
+        cache = self._get_cache(stage_name)
+        key = self.make_key(stage_name, stage, *inputs)
+
+        entry = cache.get(key)
+        if entry is not None:
+            tracing.annotate(cache='hit')
+            return entry['value']
+
+        tracing.annotate(cache='miss')
+        value = func(*inputs)
+        # A stage flags a stop-gap result (e.g. the scraper's demo text after
+        # a fetch error, the LLM fallback after a provider error) as
+        # degraded; it is returned but not memoized
+        if not getattr(stage, 'degraded', False):
+            cache.put(key, value.to_dict() if hasattr(value, 'to_dict') else value)
+        return value
+
+    def make_key(self, stage_name, stage, *inputs):
+        """
+        Hash stage name, stage fingerprint and JSON-encoded inputs
+        Values with a to_dict() (e.g. ArchitectureGraph) are encoded, and
+        stored on a miss, in that plain-data form; a hit returns it as such
+        """
+        payload = json.dumps(
+            [stage_name, self.fingerprint(stage), list(inputs)],
+            sort_keys=True,
+            separators=(',', ':'),
+            default=lambda value: value.to_dict() if hasattr(value, 'to_dict') else str(value)
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def fingerprint(self, stage):
+        """
+        Fingerprint a stage from its code and instance settings
+        The code is the stage's class source plus the source of every
+        modules.* module it depends on: its own module, the helpers that
+        imports (transitively, e.g. FuzzyIndex, KeywordMatcher) and those of
+        its attributes' classes (e.g. an AliasTable). Editing a constant
+        (e.g. VisualMapper.SHAPE_MAP), a method or a helper changes it.
+        """
+        cls = type(stage)
+        roots = {base.__module__ for base in cls.__mro__}
+        roots.update(type(value).__module__ for value in vars(stage).values())
+        cache_key = (cls, tuple(sorted(name for name in roots if self._is_package_module(name))))
+
+        with self._lock:
+            code_hash = self._fingerprints.get(cache_key)
+            if code_hash is None:
+                try:
+                    source = inspect.getsource(cls)
+                except (OSError, TypeError):
+                    source = f"{cls.__module__}.{cls.__qualname__}"
+                digest = hashlib.sha256(source.encode('utf-8'))
+                for name in sorted(self._dependencies(cache_key[1])):
+                    digest.update(f"\0{name}\0{self._module_source(name)}".encode('utf-8'))
+                code_hash = digest.hexdigest()
+                self._fingerprints[cache_key] = code_hash
+
+        settings = json.dumps(self._settings(stage), sort_keys=True)
+        return hashlib.sha256(f"{code_hash}:{settings}".encode('utf-8')).hexdigest()
+
+    def clear(self, stage_name=None):
+        """Clear one stage's entries, or every stage if stage_name is None"""
+        if stage_name:
+            names = [stage_name]
+        elif os.path.isdir(self.cache_dir):
+            names = os.listdir(self.cache_dir)
+        else:
+            names = []
+
+        for name in names:
+            self._get_cache(name).clear()
+
+    def _dependencies(self, roots):
+        """Names of the package modules reachable from roots through their imports"""
+        found = set()
+        stack = list(roots)
+        while stack:
+            name = stack.pop()
+            if name in found:
+                continue
+            found.add(name)
+
+            module = sys.modules.get(name)
+            for value in vars(module).values() if module else ():
+                # Imported modules, classes, functions and shared instances
+                dependency = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+                if isinstance(dependency, str) and self._is_package_module(dependency):
+                    stack.append(dependency)
+        return found
+
+    def _is_package_module(self, name):
+        return name.startswith(self.PACKAGE_PREFIX)
+
+    def _module_source(self, name):
+        try:
+            return inspect.getsource(sys.modules[name])
+        except (KeyError, OSError, TypeError):
+            return name
+
+    def _settings(self, stage):
+        """
+        Plain-data instance attributes (sessions, clients, locks are skipped
+        so the fingerprint stays stable across processes)
+        """
+        settings = {}
+        for name, value in vars(stage).items():
+            try:
+                json.dumps(value)
+            except (TypeError, ValueError):
+                continue
+            settings[name] = value
+        return settings
+
+    def _get_cache(self, stage_name):
+        """Lazily create the backing ResultCache for a stage"""
+        with self._lock:
+            cache = self._caches.get(stage_name)
+            if cache is None:
+                cache = ResultCache(
+                    cache_dir=os.path.join(self.cache_dir, stage_name),
+                    max_entries=self.max_entries,
+                    ttl=self.stage_ttls.get(stage_name, self.ttl)
+                )
+                self._caches[stage_name] = cache
+            return cache
@@ -1,6 +1,12 @@
+import hashlib
+import heapq
+import json
+import os
 import re
-from collections import Counter
-import math
+import tempfile
+from modules.tfidf_scorer import TfidfScorer
+from modules.keyword_matcher import KeywordMatcher
+from modules.near_duplicate_filter import NearDuplicateFilter
 
 class TextCleaner:
     """Step 4: Text Cleaning Module (ML-lite with TF-IDF)"""
@@ -25,6 +31,34 @@ class TextCleaner:
         'all rights reserved', 'terms of service', 'privacy policy'
     ]
     
+    # Inputs longer than this (chars) are cleaned in streaming mode
+    STREAM_THRESHOLD = 1_000_000
+    
+    # Sentences tokenized/scored per batch in streaming mode
+    STREAM_BATCH_SIZE = 2048
+    
+    SENTENCE_DELIMITER = re.compile(r'[.!?]+')
+    
+    # Each list compiled once into a single-pass matcher
+    KEYWORD_MATCHER = KeywordMatcher(ARCHITECTURE_KEYWORDS)
+    NOISE_MATCHER = KeywordMatcher(NOISE_WORDS, ignore_case=True)
+    
+    def __init__(self, near_duplicate_threshold=None, near_duplicate_window=None):
+        """
+        near_duplicate_threshold: word-bigram Jaccard similarity at which a
+        sentence counts as a near-duplicate of an earlier one (0 disables;
+        default from NEAR_DUPLICATE_THRESHOLD, 0.7)
+        near_duplicate_window: recent sentences a sentence is compared
+        against, which bounds the filter's memory (default from
+        NEAR_DUPLICATE_WINDOW, 4096)
+        """
+        if near_duplicate_threshold is None:
+            near_duplicate_threshold = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.7'))
+        if near_duplicate_window is None:
+            near_duplicate_window = int(os.getenv('NEAR_DUPLICATE_WINDOW', '4096'))
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.near_duplicate_window = near_duplicate_window
+    
     def clean(self, raw_text):
         """
         Clean and filter raw text using ML-lite techniques:
@@ -33,6 +67,12 @@ class TextCleaner:
         - Keep architecture keywords
         - Optional TF-IDF scoring
         """
+        # Very large inputs go through the bounded-memory path (same output)
+        if len(raw_text) > self.STREAM_THRESHOLD:
+            return self.clean_stream(
+                raw_text[i:i + self.STREAM_THRESHOLD] for i in range(0, len(raw_text), self.STREAM_THRESHOLD)
+            )
+        
         # Step 1: Remove noise
         text = self._remove_noise(raw_text)
         
@@ -61,11 +101,118 @@ class TextCleaner:
         
         return clean_text
     
+    def clean_stream(self, chunks, top_n=30):
+        """
+        Streaming variant of clean() for an iterator of raw text chunks
+        (e.g. one scraped page at a time). Produces the same text as
+        clean("".join(chunks)) while memory stays flat in corpus size (bar
+        an 8-byte hash per distinct sentence). The pipeline itself cleans
+        the stage-cached scrape string; this is for callers holding chunks.
+        - sentences are assembled across chunk boundaries
+        - duplicates are tracked by 8-byte hashes, not sentence strings
+        - pass 1 spills relevant sentences to a temp file while fitting
+          document frequencies; pass 2 scores them in batches
+        - only the top_n sentences are kept, in a bounded heap
+        """
+        scorer = TfidfScorer(boosted_terms=self.ARCHITECTURE_KEYWORDS, boost=2.0)
+        seen = set()
+        near_duplicates = self._near_duplicate_filter()
+        prefix = []
+        prefix_length = 0
+        
+        with tempfile.TemporaryFile(mode='w+', encoding='utf-8') as spill:
+            # Pass 1: split, dedupe, filter, fit IDF and spill
+            batch = []
+            for sentence in self._stream_sentences(chunks, prefix, seen, near_duplicates):
+                spill.write(json.dumps(sentence) + '\n')
+                batch.append(sentence)
+                if len(batch) >= self.STREAM_BATCH_SIZE:
+                    scorer.partial_fit(batch)
+                    batch = []
+            if batch:
+                scorer.partial_fit(batch)
+            
+            # Pass 2: score in batches, keeping the best top_n
+            # Heap of (score, -index, sentence): ties keep the earlier sentence
+            spill.seek(0)
+            heap = []
+            index = 0
+            batch = []
+            for line in spill:
+                batch.append(json.loads(line))
+                if len(batch) >= self.STREAM_BATCH_SIZE:
+                    index = self._push_top(heap, scorer, batch, index, top_n)
+                    batch = []
+            if batch:
+                self._push_top(heap, scorer, batch, index, top_n)
+        
+        top_sentences = [sentence for _, _, sentence in sorted(heap, key=lambda x: (-x[0], -x[1]))]
+        
+        clean_text = ". ".join(top_sentences)
+        clean_text = re.sub(r'\s+', ' ', clean_text)
+        
+        # Fallback if nothing found
+        if len(clean_text) < 100:
+            clean_text = "".join(prefix)[:2000]
+        
+        return clean_text
+    
+    def _stream_sentences(self, chunks, prefix, seen, near_duplicates=None):
+        """
+        Yield unique, relevant, noise-free sentences from text chunks
+        prefix collects the first 2000 raw characters (for the fallback)
+        """
+        carry = ''
+        for chunk in chunks:
+            if sum(len(part) for part in prefix) < 2000:
+                prefix.append(chunk[:2000])
+            
+            # Complete sentences end at a delimiter; the tail waits for the next chunk
+            parts = self.SENTENCE_DELIMITER.split(carry + chunk)
+            carry = parts.pop()
+            for part in parts:
+                sentence = self._stream_filter(part, seen, near_duplicates)
+                if sentence:
+                    yield sentence
+        
+        sentence = self._stream_filter(carry, seen, near_duplicates)
+        if sentence:
+            yield sentence
+    
+    def _stream_filter(self, part, seen, near_duplicates=None):
+        """Apply noise removal, length, dedupe and keyword filters to one sentence"""
+        # Noise phrases contain no delimiters, so per-sentence removal matches clean()
+        sentence = self._remove_noise(part).strip()
+        if len(sentence) <= 20:
+            return None
+        
+        sentence_normalized = sentence.lower().strip()
+        digest = hashlib.blake2b(sentence_normalized.encode('utf-8'), digest_size=8).digest()
+        if digest in seen:
+            return None
+        seen.add(digest)
+        
+        if near_duplicates and not near_duplicates.add(sentence):
+            return None
+        
+        if not self.KEYWORD_MATCHER.search(sentence_normalized):
+            return None
+        return sentence
+    
+    def _push_top(self, heap, scorer, batch, index, top_n):
+        """Score a batch and keep the top_n (score, -index, sentence) entries"""
+        for score, sentence in zip(scorer.score(batch).tolist(), batch):
+            entry = (score, -index, sentence)
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif heap and entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            index += 1
+        return index
+    
     def _remove_noise(self, text):
-        """Remove advertisement and noise content"""
-        for noise in self.NOISE_WORDS:
-            text = re.sub(re.escape(noise), '', text, flags=re.IGNORECASE)
-        return text
+        """Remove advertisement and noise content (one pass for all noise phrases)"""
+        return self.NOISE_MATCHER.sub('', text)
     
     def _split_sentences(self, text):
         """Split text into sentences"""
@@ -75,7 +222,7 @@ class TextCleaner:
         return [s.strip() for s in sentences if len(s.strip()) > 20]
     
     def _remove_duplicates(self, sentences):
-        """Remove duplicate sentences"""
+        """Remove duplicate and near-duplicate sentences"""
         seen = set()
         unique = []
         
@@ -85,63 +232,38 @@ class TextCleaner:
                 seen.add(sentence_normalized)
                 unique.append(sentence)
         
+        # Syndicated copies differing by punctuation or a word or two
+        near_duplicates = self._near_duplicate_filter()
+        if near_duplicates:
+            unique = near_duplicates.filter(unique)
+        
         return unique
     
+    def _near_duplicate_filter(self):
+        """MinHash LSH filter for the configured threshold, or None if disabled"""
+        if not self.near_duplicate_threshold:
+            return None
+        return NearDuplicateFilter(
+            threshold=self.near_duplicate_threshold, window=self.near_duplicate_window
+        )
+    
     def _filter_by_keywords(self, sentences):
         """Filter sentences containing architecture keywords"""
-        filtered = []
-        
-        for sentence in sentences:
-            sentence_lower = sentence.lower()
-            keyword_count = sum(1 for kw in self.ARCHITECTURE_KEYWORDS if kw in sentence_lower)
-            
-            # Keep if has at least 1 architecture keyword
-            if keyword_count >= 1:
-                filtered.append(sentence)
-        
-        return filtered
+        # Keep if has at least 1 architecture keyword
+        return [sentence for sentence in sentences if self.KEYWORD_MATCHER.search(sentence.lower())]
     
     def _score_sentences_tfidf(self, sentences):
         """
         Score sentences using simplified TF-IDF
         TF = Term Frequency in sentence
         IDF = Inverse Document Frequency across all sentences
+        Architecture keywords get a 2x boost. Scores are computed in bulk
+        over one sparse term-document matrix (see TfidfScorer).
         """
-        if not sentences:
-            return []
-        
-        # Calculate document frequency for each word
-        doc_freq = Counter()
-        total_docs = len(sentences)
-        
-        for sentence in sentences:
-            words = set(re.findall(r'\w+', sentence.lower()))
-            for word in words:
-                doc_freq[word] += 1
-        
-        # Score each sentence
-        scored = []
-        for sentence in sentences:
-            words = re.findall(r'\w+', sentence.lower())
-            word_freq = Counter(words)
-            
-            # Calculate TF-IDF score
-            score = 0
-            for word in word_freq:
-                tf = word_freq[word] / len(words) if words else 0
-                idf = math.log(total_docs / (doc_freq[word] + 1))
-                
-                # Boost score for architecture keywords
-                boost = 2.0 if word in self.ARCHITECTURE_KEYWORDS else 1.0
-                
-                score += tf * idf * boost
-            
-            scored.append((sentence, score))
-        
-        # Sort by score (descending)
-        scored.sort(key=lambda x: x[1], reverse=True)
+        scorer = TfidfScorer(boosted_terms=self.ARCHITECTURE_KEYWORDS, boost=2.0)
         
-        return scored
+        # Sorted by score (descending), ties keep sentence order
+        return scorer.rank(sentences)
     
     def _select_top_sentences(self, scored_sentences, top_n=30):
         """Select top N sentences by score"""
@@ -149,5 +271,4 @@ class TextCleaner:
     
     def _contains_architecture_keywords(self, text):
         """Check if text contains architecture-related keywords"""
-        count = sum(1 for keyword in self.ARCHITECTURE_KEYWORDS if keyword in text)
-        return count >= 1
+        return self.KEYWORD_MATCHER.search(text)
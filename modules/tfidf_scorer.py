@@ -0,0 +1,136 @@
+import math
+import re
+import numpy as np
+
+class TfidfScorer:
+    """
+    Vectorized TF-IDF sentence scoring over a shared vocabulary
+
+    Sentences are tokenized once into a sparse term-document matrix (COO
+    arrays), and every score is computed in bulk with np.bincount. fit/
+    partial_fit accumulate document frequencies, so a corpus can be fitted
+    in batches and scored afterwards.
+    """
+
+    TOKEN_PATTERN = re.compile(r'\w+')
+
+    def __init__(self, boosted_terms=(), boost=2.0):
+        """
+        boosted_terms: terms whose TF-IDF is multiplied by `boost`
+        (only single \\w+ tokens can ever match)
+        """
+        self.boosted_terms = frozenset(boosted_terms)
+        self.boost = boost
+        self.reset()
+
+    def reset(self):
+        """Forget the vocabulary and document frequencies"""
+        self.vocabulary = {}
+        self.total_docs = 0
+        self._doc_freq = np.zeros(0, dtype=np.int64)
+        self._weights = np.zeros(0, dtype=np.float64)
+        self._idf = None
+
+    def tokenize(self, sentence):
+        return self.TOKEN_PATTERN.findall(sentence.lower())
+
+    def fit(self, sentences):
+        """Reset and fit document frequencies; returns the term matrix"""
+        self.reset()
+        return self.partial_fit(sentences)
+
+    def partial_fit(self, sentences):
+        """Add sentences to the document frequencies; returns their term matrix"""
+        matrix = self.term_matrix(sentences)
+        docs, terms, counts, lengths = matrix
+
+        self._doc_freq += np.bincount(terms, minlength=len(self._doc_freq))
+        self.total_docs += len(lengths)
+        self._idf = None
+        return matrix
+
+    def score(self, sentences=None, matrix=None):
+        """
+        TF-IDF score per sentence: sum over distinct words of
+        (count / sentence length) * log(N / (df + 1)) * boost
+        Pass the matrix returned by fit/partial_fit to skip re-tokenizing.
+        """
+        if matrix is None:
+            matrix = self.term_matrix(sentences)
+        docs, terms, counts, lengths = matrix
+
+        if len(lengths) == 0:
+            return np.zeros(0, dtype=np.float64)
+
+        tf = counts / lengths[docs]
+        values = tf * self._get_idf()[terms] * self._weights[terms]
+        return np.bincount(docs, weights=values, minlength=len(lengths))
+
+    def rank(self, sentences):
+        """Fit on `sentences` and return (sentence, score) pairs, best first (stable)"""
+        if not sentences:
+            return []
+
+        scores = self.score(matrix=self.fit(sentences))
+        order = np.argsort(-scores, kind='stable')
+        return [(sentences[i], float(scores[i])) for i in order]
+
+    def term_matrix(self, sentences):
+        """
+        Sparse term-document matrix as COO arrays (docs, terms, counts) plus
+        per-sentence token counts. Entries for a sentence are in first-occurrence
+        order of their terms, so per-sentence sums add up in the same order as
+        a word-by-word loop would.
+        """
+        token_lists = [self.tokenize(sentence) for sentence in sentences]
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+
+        vocabulary = self.vocabulary
+        known = len(vocabulary)
+        term_ids = np.fromiter(
+            (vocabulary.setdefault(token, len(vocabulary)) for tokens in token_lists for token in tokens),
+            dtype=np.int64,
+            count=int(lengths.sum())
+        )
+        self._grow(known)
+
+        if len(term_ids) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, lengths
+
+        # Collapse repeated (sentence, term) pairs, keeping first-occurrence order
+        doc_ids = np.repeat(np.arange(len(token_lists), dtype=np.int64), lengths)
+        pair_keys = doc_ids * len(vocabulary) + term_ids
+        unique_keys, first_index, counts = np.unique(pair_keys, return_index=True, return_counts=True)
+        order = np.argsort(first_index, kind='stable')
+
+        unique_keys = unique_keys[order]
+        return unique_keys // len(vocabulary), unique_keys % len(vocabulary), counts[order], lengths
+
+    def _grow(self, known):
+        """Extend per-term arrays for terms added to the vocabulary since `known`"""
+        added = len(self.vocabulary) - known
+        if added <= 0:
+            return
+
+        new_terms = list(self.vocabulary)[known:]
+        self._doc_freq = np.concatenate([self._doc_freq, np.zeros(added, dtype=np.int64)])
+        self._weights = np.concatenate([
+            self._weights,
+            np.fromiter(
+                (self.boost if term in self.boosted_terms else 1.0 for term in new_terms),
+                dtype=np.float64,
+                count=added
+            )
+        ])
+        self._idf = None
+
+    def _get_idf(self):
+        """IDF per term (math.log keeps results bit-identical to scalar scoring)"""
+        if self._idf is None:
+            total = self.total_docs
+            self._idf = np.array(
+                [math.log(total / (df + 1)) if total else 0.0 for df in self._doc_freq.tolist()],
+                dtype=np.float64
+            )
+        return self._idf
@@ -0,0 +1,171 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+_current_trace = contextvars.ContextVar('pipeline_trace', default=None)
+
+class MetricsRegistry:
+    """Process-wide stage metrics, exported in Prometheus text format"""
+
+    # Histogram buckets for stage durations (seconds)
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._counters = {}
+
+    def observe_span(self, span):
+        """Record a finished span's duration, cache flag and size attributes"""
+        stage = span['stage']
+        seconds = span['duration_ms'] / 1000
+
+        with self._lock:
+            histogram = self._durations.setdefault(stage, {'buckets': [0] * len(self.BUCKETS), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+            status = 'error' if span.get('error') else 'ok'
+            self._increment('pipeline_stage_runs_total', (('stage', stage), ('status', status)))
+
+            for name, value in span['attributes'].items():
+                if name == 'cache':
+                    self._increment('pipeline_cache_requests_total', (('stage', stage), ('result', value)))
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._increment('pipeline_stage_measure_total', (('stage', stage), ('measure', name)), value)
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP pipeline_stage_duration_seconds Time spent in each pipeline stage',
+            '# TYPE pipeline_stage_duration_seconds histogram'
+        ]
+
+        with self._lock:
+            for stage, histogram in sorted(self._durations.items()):
+                for bound, count in zip(self.BUCKETS, histogram['buckets']):
+                    lines.append(f'pipeline_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'pipeline_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'pipeline_stage_duration_seconds_sum{{stage="{stage}"}} {histogram["sum"]:.6f}')
+                lines.append(f'pipeline_stage_duration_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+
+            help_text = {
+                'pipeline_stage_runs_total': 'Pipeline stage executions by outcome',
+                'pipeline_cache_requests_total': 'Cache lookups per stage by result (hit/miss)',
+                'pipeline_stage_measure_total': 'Cumulative per-stage measures (bytes, sentences, components, edges, pixels, cache hits)'
+            }
+            for metric in sorted(help_text):
+                lines.append(f'# HELP {metric} {help_text[metric]}')
+                lines.append(f'# TYPE {metric} counter')
+                for (name, labels), value in sorted(self._counters.items()):
+                    if name != metric:
+                        continue
+                    label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f'{metric}{{{label_text}}} {value if isinstance(value, int) else round(value, 6)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def _increment(self, name, labels, value=1):
+        """Add to a labelled counter (caller holds the lock)"""
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+# Shared by every trace in the process and exported by /api/metrics
+registry = MetricsRegistry()
+
+class Trace:
+    """Structured timing spans for one pipeline run"""
+
+    def __init__(self, metrics=registry):
+        self.metrics = metrics
+        self.spans = []
+        self._open = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage):
+        """Time a stage; attributes can be added to the yielded span dict"""
+        span = {'stage': stage, 'start': time.time(), 'duration_ms': None, 'attributes': {}}
+        with self._lock:
+            self._open.append(span)
+
+        started = time.perf_counter()
+        try:
+            yield span['attributes']
+        except Exception:
+            span['error'] = True
+            raise
+        finally:
+            span['duration_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            with self._lock:
+                self._open.remove(span)
+                self.spans.append(span)
+            if self.metrics:
+                self.metrics.observe_span(span)
+
+    def annotate(self, **attributes):
+        """Set attributes on the innermost open span"""
+        with self._lock:
+            if self._open:
+                self._open[-1]['attributes'].update(attributes)
+
+    def increment(self, name, value=1):
+        """Add to a numeric attribute on the innermost open span"""
+        with self._lock:
+            if self._open:
+                attributes = self._open[-1]['attributes']
+                attributes[name] = attributes.get(name, 0) + value
+
+    def server_timing(self):
+        """Format spans as a Server-Timing header value"""
+        entries = []
+        for span in self.spans:
+            entry = f"{span['stage']};dur={span['duration_ms']:.1f}"
+            if 'cache' in span['attributes']:
+                entry += f';desc="cache {span["attributes"]["cache"]}"'
+            entries.append(entry)
+        return ', '.join(entries)
+
+    def to_dict(self):
+        """JSON-friendly copy of the recorded spans"""
+        with self._lock:
+            return [dict(span, attributes=dict(span['attributes'])) for span in self.spans]
+
+@contextmanager
+def use_trace(trace):
+    """Make `trace` the active trace for the current context"""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+def current_trace():
+    return _current_trace.get()
+
+@contextmanager
+def span(stage):
+    """Open a span on the active trace (no-op without one)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield {}
+        return
+
+    with trace.span(stage) as attributes:
+        yield attributes
+
+def annotate(**attributes):
+    """Set attributes on the active trace's innermost span (no-op without one)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.annotate(**attributes)
+
+def increment(name, value=1):
+    """Add to a numeric attribute on the active span (no-op without one)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.increment(name, value)
@@ -1,7 +1,11 @@
+from modules.component_classifier import ComponentClassifier
+from modules.architecture_graph import ArchitectureGraph
+
 class VisualMapper:
     """Step 7: Visual Mapping Module"""
     
-    # Component type to shape mapping
+    # Component type to shape mapping (keyword found in the lowercased name;
+    # the first listed keyword that matches decides the shape)
     SHAPE_MAP = {
         # Network/Infrastructure
         'gateway': 'hexagon',
@@ -39,6 +43,19 @@ class VisualMapper:
         'frontend': 'ellipse',
     }
     
+    # Fill colour per shape (anything else: services/servers grey)
+    SHAPE_COLORS = {
+        'cylinder': '#4A90E2',       # Databases: blue
+        'hexagon': '#7B68EE',        # Gateways: purple
+        'diamond': '#FF6B6B',        # Load Balancers: red
+        'parallelogram': '#FFA500',  # Queues: orange
+        'ellipse': '#50C878',        # Clients: green
+    }
+    DEFAULT_COLOR = '#95A5A6'
+    
+    # All SHAPE_MAP keywords compiled into one matcher, SHAPE_MAP order as priority
+    SHAPE_CLASSIFIER = ComponentClassifier(SHAPE_MAP.items(), default='rectangle')
+    
     # Relationship type to arrow style
     ARROW_MAP = {
         'request': 'solid',
@@ -58,65 +75,37 @@ class VisualMapper:
         """
         Map components to visual shapes and relationships to arrow styles
         """
+        return self.map_graph(normalized_data).to_dict()
+    
+    def map_graph(self, normalized_data):
+        """
+        map_visuals() straight into an ArchitectureGraph (names interned once,
+        shapes/colours/arrow styles stored as codes) for the layout and
+        render stages
+        """
         components = normalized_data['components']
-        relationships = normalized_data['relationships']
+        graph = ArchitectureGraph()
         
-        visual_components = []
-        for comp in components:
-            shape = self._get_shape(comp)
-            color = self._get_color(comp, shape)
-            
-            visual_components.append({
-                'name': comp,
-                'shape': shape,
-                'color': color
-            })
+        shapes = self.SHAPE_CLASSIFIER.classify_batch(components)
+        for comp, shape in zip(components, shapes):
+            graph.add_node(comp, shape, self._get_color(comp, shape))
         
-        visual_relationships = []
-        for rel in relationships:
-            arrow_style = self.ARROW_MAP.get(rel['type'].lower(), 'solid')
-            
-            visual_relationships.append({
-                'from': rel['from'],
-                'to': rel['to'],
-                'type': rel['type'],
-                'arrow_style': arrow_style
-            })
+        arrow_map = self.ARROW_MAP
+        graph.add_edges(
+            (rel['from'], rel['to'], rel['type'], arrow_map.get(rel['type'].lower(), 'solid'))
+            for rel in normalized_data['relationships']
+        )
         
-        return {
-            'components': visual_components,
-            'relationships': visual_relationships
-        }
+        return graph
     
     def _get_shape(self, component_name):
         """
         Determine shape based on component name
         """
-        name_lower = component_name.lower()
-        
-        for keyword, shape in self.SHAPE_MAP.items():
-            if keyword in name_lower:
-                return shape
-        
-        # Default shape
-        return 'rectangle'
+        return self.SHAPE_CLASSIFIER.classify(component_name)
     
     def _get_color(self, component_name, shape):
         """
         Determine color based on component type
         """
-        name_lower = component_name.lower()
-        
-        # Color scheme based on component type
-        if shape == 'cylinder':  # Databases
-            return '#4A90E2'  # Blue
-        elif shape == 'hexagon':  # Gateways
-            return '#7B68EE'  # Purple
-        elif shape == 'diamond':  # Load Balancers
-            return '#FF6B6B'  # Red
-        elif shape == 'parallelogram':  # Queues
-            return '#FFA500'  # Orange
-        elif shape == 'ellipse':  # Clients
-            return '#50C878'  # Green
-        else:  # Services/Servers
-            return '#95A5A6'  # Gray
+        return self.SHAPE_COLORS.get(shape, self.DEFAULT_COLOR)
@@ -1,67 +1,354 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+import codecs
+import contextvars
+import threading
+import time
 import re
+from modules import tracing
+
+class _ParagraphExtractor(HTMLParser):
+    """
+    Event-driven paragraph extractor
+    Skips unwanted subtrees without materializing them and emits each
+    <p>/<article> block's own text exactly once as soon as it closes
+    """
+    
+    SKIP_TAGS = {'script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe'}
+    BLOCK_TAGS = {'p', 'article'}
+    
+    def __init__(self, min_length=50):
+        super().__init__(convert_charrefs=True)
+        self.min_length = min_length
+        self.paragraphs = []
+        self._skip_tag = None
+        self._skip_depth = 0
+        self._blocks = []
+    
+    def handle_starttag(self, tag, attrs):
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        
+        if tag in self.SKIP_TAGS:
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+        
+        # <p> cannot nest: an open paragraph ends where the next one starts
+        if tag == 'p' and self._blocks and self._blocks[-1][0] == 'p':
+            self._close_block()
+        
+        if tag in self.BLOCK_TAGS:
+            self._blocks.append((tag, []))
+    
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags carry no text
+        pass
+    
+    def handle_endtag(self, tag):
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        
+        if tag in self.BLOCK_TAGS and any(open_tag == tag for open_tag, _ in self._blocks):
+            # Close implicitly-open inner blocks up to the matching one
+            while self._blocks:
+                open_tag = self._blocks[-1][0]
+                self._close_block()
+                if open_tag == tag:
+                    break
+    
+    def handle_data(self, data):
+        if self._skip_tag or not self._blocks:
+            return
+        self._blocks[-1][1].append(data)
+    
+    def close(self):
+        super().close()
+        while self._blocks:
+            self._close_block()
+    
+    def _close_block(self):
+        _, fragments = self._blocks.pop()
+        text = ''.join(fragments).strip()
+        # Only include paragraphs with substantial content
+        if len(text) > self.min_length:
+            self.paragraphs.append(text)
 
 class WebScraper:
     """Step 3: Web Scraping Module"""
     
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    
+    # Bump when _extract_text changes so cached pages are re-parsed
+    PARSER_VERSION = 2
+    
+    CHUNK_SIZE = 16 * 1024
+    
+    # Keep-alive connection pool shared by every scraper and worker thread
+    _session = None
+    _session_lock = threading.Lock()
+    
+    # Per-host concurrency limits, shared across requests
+    _host_semaphores = {}
+    _host_lock = threading.Lock()
+    
+    def __init__(self, max_workers=8, max_per_host=2, request_timeout=10, stage_timeout=15,
+                 max_page_bytes=1024 * 1024, http_cache=None):
+        self.http_cache = http_cache
+        self.max_page_bytes = max_page_bytes
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.request_timeout = request_timeout
+        self.stage_timeout = stage_timeout
+        
+        # Set when a page was replaced by the demo fallback content (fetch
+        # error, host slot or stage deadline) or dropped, so callers can keep
+        # the stop-gap text out of their caches
+        self.degraded = False
+    
     def scrape_urls(self, urls):
         """
-        Scrape text content from list of URLs
-        Returns combined raw text
+        Scrape text content from list of URLs concurrently
+        The whole stage shares one deadline (stage_timeout) instead of
+        serial per-URL timeouts. Returns combined raw text in URL order.
+        """
+        return "".join(self.iter_texts(urls))
+    
+    def iter_texts(self, urls):
         """
-        all_text = []
+        Yield the combined raw text of scrape_urls() piecewise: each page's
+        text (and the blank-line separators) in URL order, as soon as that
+        page and the ones before it are done. Feed to TextCleaner.clean_stream
+        to avoid holding every page at once.
+        """
+        self.degraded = False
+        if not urls:
+            return
         
-        for url in urls:
-            try:
-                text = self._scrape_single_url(url)
+        deadline = time.monotonic() + self.stage_timeout
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls)))
+        
+        try:
+            # Each worker runs in a copy of the caller's context so fetches report into its trace
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._scrape_with_host_limit, url, deadline)
+                for url in urls
+            ]
+            
+            first = True
+            for url, future in zip(urls, futures):
+                try:
+                    text = future.result(timeout=max(0, deadline - time.monotonic()))
+                except FuturesTimeoutError:
+                    print(f"Error scraping {url}: stage deadline exceeded")
+                    text = self._get_fallback_content()
+                except Exception as e:
+                    print(f"Error scraping {url}: {e}")
+                    self.degraded = True
+                    continue
+                
                 if text:
-                    all_text.append(text)
-            except Exception as e:
-                print(f"Error scraping {url}: {e}")
-                continue
+                    if not first:
+                        yield "\n\n"
+                    yield text
+                    first = False
+        finally:
+            # Don't block on stragglers past the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    @classmethod
+    def _get_session(cls, pool_size):
+        """Return the process-wide keep-alive session"""
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                session.headers.update(cls.HEADERS)
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                cls._session = session
+            return cls._session
+    
+    def _get_host_semaphore(self, url):
+        """Return the semaphore capping concurrent fetches to the URL's host"""
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_per_host)
+                self._host_semaphores[host] = semaphore
+            return semaphore
+    
+    def _scrape_with_host_limit(self, url, deadline):
+        """
+        Scrape a URL while holding its host's concurrency slot
+        """
+        semaphore = self._get_host_semaphore(url)
+        remaining = deadline - time.monotonic()
         
-        return "\n\n".join(all_text)
+        if remaining <= 0 or not semaphore.acquire(timeout=remaining):
+            print(f"Error scraping {url}: no free slot for host before deadline")
+            return self._get_fallback_content()
+        
+        try:
+            return self._scrape_single_url(url, deadline)
+        finally:
+            semaphore.release()
     
-    def _scrape_single_url(self, url):
+    def _scrape_single_url(self, url, deadline=None):
         """
         Scrape text from a single URL
+        With an HTTP cache, fresh pages are served locally and stale ones are
+        revalidated with If-None-Match / If-Modified-Since
         """
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        entry = self.http_cache.get(url) if self.http_cache else None
+        
+        if entry and self.http_cache.is_fresh(entry) and entry.get('parser_version') == self.PARSER_VERSION:
+            tracing.increment('http_cache_hits')
+            return entry['text']
+        
+        timeout = self.request_timeout
+        if deadline is not None:
+            timeout = max(0.1, min(timeout, deadline - time.monotonic()))
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            headers = self.http_cache.conditional_headers(entry) if entry else {}
+            session = self._get_session(self.max_workers)
+            response = session.get(url, headers=headers, timeout=timeout, stream=True)
             
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe']):
-                element.decompose()
+            # Not modified: reuse the stored text (re-parse only after a parser change)
+            if response.status_code == 304 and entry:
+                response.close()
+                tracing.increment('http_revalidated')
+                if entry.get('parser_version') == self.PARSER_VERSION:
+                    self.http_cache.revalidated(entry, response.headers)
+                    return entry['text']
+                
+                body = self.http_cache.load_body(url)
+                if body is not None:
+                    text = self._extract_text(body)
+                    self.http_cache.revalidated(entry, response.headers, text, self.PARSER_VERSION)
+                    return text
+                
+                # Body lost from the cache, fetch it unconditionally
+                response = session.get(url, timeout=timeout, stream=True)
             
-            # Extract paragraphs
-            paragraphs = soup.find_all(['p', 'article', 'div.content'])
+            with response:
+                response.raise_for_status()
+                
+                raw_chunks = []
+                chunks = self._stream_body(response, raw_chunks)
+                text = "\n".join(self._iter_paragraphs(chunks))
             
-            text_parts = []
-            for p in paragraphs:
-                text = p.get_text().strip()
-                # Only include paragraphs with substantial content
-                if len(text) > 50:
-                    text_parts.append(text)
+            tracing.increment('bytes_downloaded', sum(len(chunk) for chunk in raw_chunks))
+            if self.http_cache:
+                self.http_cache.store(url, b''.join(raw_chunks), response.headers, text, self.PARSER_VERSION)
             
-            return "\n".join(text_parts)
+            return text
             
         except Exception as e:
             print(f"Error in _scrape_single_url: {e}")
+            
+            # Serve a stale copy while the origin is failing
+            if entry and self.http_cache.is_usable_stale(entry):
+                tracing.increment('http_stale_served')
+                return entry['text']
+            
             # Return fallback content for demo
+            tracing.increment('fallbacks')
             return self._get_fallback_content()
     
+    def _stream_body(self, response, raw_chunks=None):
+        """
+        Yield decoded text chunks of a streamed response, stopping at max_page_bytes
+        raw_chunks: optional list collecting the raw bytes read (for caching)
+        """
+        decoder = None
+        bytes_read = 0
+        
+        for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+            if not chunk:
+                continue
+            
+            chunk = chunk[:self.max_page_bytes - bytes_read]
+            bytes_read += len(chunk)
+            
+            if raw_chunks is not None:
+                raw_chunks.append(chunk)
+            
+            if decoder is None:
+                encoding = self._detect_encoding(response.headers.get('Content-Type', ''), chunk)
+                decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            
+            yield decoder.decode(chunk)
+            
+            if bytes_read >= self.max_page_bytes:
+                break
+        
+        if decoder is not None:
+            yield decoder.decode(b'', final=True)
+    
+    def _iter_paragraphs(self, chunks):
+        """
+        Feed text chunks to the streaming extractor, yielding paragraphs as they close
+        """
+        parser = _ParagraphExtractor()
+        emitted = 0
+        
+        for chunk in chunks:
+            parser.feed(chunk)
+            while emitted < len(parser.paragraphs):
+                yield parser.paragraphs[emitted]
+                emitted += 1
+        
+        parser.close()
+        yield from parser.paragraphs[emitted:]
+    
+    def _extract_text(self, html):
+        """
+        Extract substantial paragraph text from an HTML document (bytes or str)
+        """
+        if isinstance(html, bytes):
+            html = html[:self.max_page_bytes]
+            html = html.decode(self._detect_encoding('', html), errors='replace')
+        
+        return "\n".join(self._iter_paragraphs([html]))
+    
+    def _detect_encoding(self, content_type, head):
+        """
+        Pick a charset from the Content-Type header or a <meta> tag, defaulting to UTF-8
+        """
+        match = re.search(r'charset=["\']?([\w-]+)', content_type, re.IGNORECASE)
+        if not match:
+            match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', head[:4096], re.IGNORECASE)
+            
+        if match:
+            encoding = match.group(1)
+            if isinstance(encoding, bytes):
+                encoding = encoding.decode('ascii', errors='ignore')
+            try:
+                return codecs.lookup(encoding).name
+            except LookupError:
+                pass
+        
+        return 'utf-8'
+    
     def _get_fallback_content(self):
         """
-        Fallback content when scraping fails
+        Fallback content when scraping fails (flags the scrape as degraded)
         """
+        self.degraded = True
         return """
         System architecture consists of multiple components working together.
         The API Gateway handles incoming requests and routes them to appropriate services.
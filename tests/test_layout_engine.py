@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.layout_engine import LayoutEngine
+from modules.visual_mapper import VisualMapper
+
+
+def _layout(components, relationships):
+    visual = VisualMapper().map_visuals({'components': components, 'relationships': relationships})
+    return LayoutEngine().calculate_layout(visual)
+
+
+def test_cyclic_graph_uses_simple_layering():
+    # topological_sort raises NetworkXUnfeasible on a cycle; the layout
+    # must fall back to simple layering instead of failing
+    positioned = _layout(
+        ['Client', 'API Gateway', 'User Service'],
+        [
+            {'from': 'Client', 'to': 'API Gateway', 'type': 'request'},
+            {'from': 'API Gateway', 'to': 'User Service', 'type': 'request'},
+            {'from': 'User Service', 'to': 'Client', 'type': 'response'}
+        ]
+    )
+
+    assert set(positioned['positions']) == {'Client', 'API Gateway', 'User Service'}
+
+
+def test_acyclic_graph_is_layered_by_depth():
+    positioned = _layout(
+        ['Client', 'API Gateway', 'Database'],
+        [
+            {'from': 'Client', 'to': 'API Gateway', 'type': 'request'},
+            {'from': 'API Gateway', 'to': 'Database', 'type': 'query'}
+        ]
+    )
+
+    positions = positioned['positions']
+    assert positions['Client'][0] < positions['API Gateway'][0] < positions['Database'][0]